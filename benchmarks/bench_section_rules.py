@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Замер выбора правила раздела в зависимости от числа правил
+
+Сравнивает SectionRuleSet.match с прямым перебором `keyword in title`.
+Запуск: python benchmarks/bench_section_rules.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from md_to_pptx import SectionRuleSet
+
+
+def make_rules(count, rng):
+    words = ["".join(rng.choice("абвгдежзиклмнопрст") for _ in range(rng.randint(4, 9))) for _ in range(count)]
+    return [{"name": f"r{i}", "keywords": [word], "ignore_case": i % 2 == 0} for i, word in enumerate(words)]
+
+
+def make_titles(count, rules, rng):
+    titles = []
+    for i in range(count):
+        title = " ".join("".join(rng.choice("абвгдежзиклмнопрст") for _ in range(6)) for _ in range(5))
+        if i % 4 == 0:
+            title += " " + rng.choice(rules)["keywords"][0]
+        titles.append(title)
+    return titles
+
+
+def substring_loop(rules, title):
+    folded = title.casefold()
+    for rule in rules:
+        for keyword in rule["keywords"]:
+            if (keyword.casefold() in folded) if rule["ignore_case"] else (keyword in title):
+                return rule
+    return None
+
+
+def per_title_us(func, titles, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for title in titles:
+            func(title)
+        best = min(best, time.perf_counter() - started)
+    return best / len(titles) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'правил':>7} {'SectionRuleSet, мкс':>20} {'перебор, мкс':>14}")
+    for count in (5, 10, 20, 50, 500, 5000):
+        rules = make_rules(count, rng)
+        titles = make_titles(1000, rules, rng)
+        ruleset = SectionRuleSet(rules)
+        compiled = per_title_us(ruleset.match, titles)
+        loop = per_title_us(lambda title: substring_loop(rules, title), titles)
+        print(f"{count:>7} {compiled:>20.2f} {loop:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
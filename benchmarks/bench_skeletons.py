@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Замер построения слайдов по заготовкам
+
+Сравнивает render_slide (копия заранее оформленной заготовки) с прямым
+вызовом функций create_* для каждого вида слайда.
+Запуск: python benchmarks/bench_skeletons.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from md_to_pptx import SLIDE_BUILDERS, get_slide_skeletons, new_presentation, render_slide, slide_spec
+
+SPECS = {
+    "title": slide_spec("title", title="Квартальный отчет", subtitle="Часть 1 из 3"),
+    "bullets": slide_spec("bullets", title="Итоги", bullets=[f"Пункт списка номер {i}" for i in range(7)]),
+    "content": slide_spec("content", title="Описание", content_text="Первая строка текста\nВторая строка"),
+    "table": slide_spec("table", title="Таблица", table_data=[[f"{i}.{j}" for j in range(5)] for i in range(8)]),
+    "code": slide_spec("code", title="Код", code="def f(x):\n    return x * 2\n" * 4, language="python"),
+}
+
+
+def per_slide_ms(build, spec, count=500, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        prs = new_presentation()
+        started = time.perf_counter()
+        for _ in range(count):
+            build(prs, spec)
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e3
+
+
+def create_slide(prs, spec):
+    return SLIDE_BUILDERS[spec["kind"]](prs, **{key: value for key, value in spec.items() if key != "kind"})
+
+
+def main():
+    # Заготовки и подсветка строятся один раз за процесс и в замер не входят
+    get_slide_skeletons()
+    for spec in SPECS.values():
+        render_slide(new_presentation(), spec)
+    print(f"{'вид':>8} {'render_slide, мс':>17} {'create_*, мс':>13} {'ускорение':>10}")
+    for kind, spec in SPECS.items():
+        skeleton = per_slide_ms(render_slide, spec)
+        direct = per_slide_ms(create_slide, spec)
+        print(f"{kind:>8} {skeleton:>17.3f} {direct:>13.3f} {direct / skeleton:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Замер построения слайда с таблицей
+
+Сравнивает add_table_to_slide (XML таблицы одной строкой) с заполнением
+ячеек через объекты python-pptx, как это делалось раньше, и проверяет,
+что оба способа дают одинаковый XML.
+Запуск: python benchmarks/bench_tables.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lxml import etree
+from pptx.dml.color import RGBColor
+from pptx.util import Inches, Pt
+
+from md_to_pptx import (
+    COLORS, TABLE_FONT_SIZE, TABLE_MAX_COLS, TABLE_MAX_ROWS,
+    add_table_to_slide, clean_markdown_text, new_presentation,
+)
+
+
+def add_table_per_cell(slide, table_data):
+    """Прежний способ: таблица python-pptx и оформление каждой ячейки"""
+    rows = min(len(table_data), TABLE_MAX_ROWS)
+    cols = min(len(table_data[0]), TABLE_MAX_COLS)
+    table = slide.shapes.add_table(rows, cols, Inches(0.5), Inches(1.2), Inches(9), Inches(4)).table
+    for i, row in enumerate(table_data[:rows]):
+        for j, cell_text in enumerate(row[:cols]):
+            cell = table.cell(i, j)
+            cell.text = clean_markdown_text(cell_text)
+            cell.text_frame.paragraphs[0].font.size = Pt(TABLE_FONT_SIZE)
+            cell.text_frame.paragraphs[0].font.color.rgb = COLORS['text']
+            cell.text_frame.word_wrap = True
+            if i == 0:
+                cell.text_frame.paragraphs[0].font.bold = True
+                cell.fill.solid()
+                cell.fill.fore_color.rgb = COLORS['primary']
+                cell.text_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)
+
+
+def make_table(rows, cols):
+    table = [[f"**Столбец {j + 1}**" for j in range(cols)]]
+    table += [[f"Значение {i}.{j} с `кодом` и\x0cразрывом" for j in range(cols)] for i in range(rows - 1)]
+    return table
+
+
+def per_table_ms(build, table_data, repeat=5, count=50):
+    best = float("inf")
+    for _ in range(repeat):
+        prs = new_presentation()
+        slides = [prs.slides.add_slide(prs.slide_layouts[5]) for _ in range(count)]
+        started = time.perf_counter()
+        for slide in slides:
+            build(slide, table_data)
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e3
+
+
+def frame_xml(build, table_data):
+    prs = new_presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    build(slide, table_data)
+    return etree.tostring(slide.shapes[-1]._element)
+
+
+def main():
+    print(f"{'таблица':>8} {'XML одной строкой, мс':>22} {'по ячейкам, мс':>15} {'XML совпадает':>14}")
+    for rows, cols in ((3, 3), (8, 5), (50, 5)):
+        table_data = make_table(rows, cols)
+        bulk = per_table_ms(add_table_to_slide, table_data)
+        per_cell = per_table_ms(add_table_per_cell, table_data)
+        same = frame_xml(add_table_to_slide, table_data) == frame_xml(add_table_per_cell, table_data)
+        print(f"{f'{cols}x{rows}':>8} {bulk:>22.2f} {per_cell:>15.2f} {'да' if same else 'нет':>14}")
+
+
+if __name__ == "__main__":
+    main()
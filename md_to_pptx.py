@@ -2,12 +2,23 @@
 """
 Улучшенный конвертер Markdown презентации в PowerPoint
 """
+import copy
 import re
+import sys
+
+if __name__ == "__main__":
+    # Если запущен демон, отдаем ему задачу до импорта python-pptx
+    from md_to_pptx_daemon import try_daemon_cli
+    try_daemon_cli(sys.argv[1:])
+
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.slide import SlidePart
+from pptx.text.text import _Paragraph
 
 # Цветовая схема
 COLORS = {
@@ -19,6 +30,16 @@ COLORS = {
     'light': RGBColor(102, 102, 102),     # Светло-серый
 }
 
+def is_section_header(line):
+    """Проверяет, начинает ли строка основной раздел (##, но не ###)"""
+    return line.startswith('##') and not line.startswith('###')
+
+def section_title(line):
+    """Извлекает заголовок раздела из строки ## без нумерации и эмодзи-цифр"""
+    title = line.replace('##', '').strip()
+    title = re.sub(r'[0-9️⃣1️⃣2️⃣3️⃣4️⃣5️⃣6️⃣7️⃣8️⃣9️⃣🔟]', '', title).strip()
+    return re.sub(r'^\d+\.\s*', '', title)
+
 def parse_markdown_sections(md_content):
     """Парсит Markdown и извлекает разделы с подразделами"""
     sections = []
@@ -26,25 +47,25 @@ def parse_markdown_sections(md_content):
     
     lines = md_content.split('\n')
     current_subsection = None
+    # Внутри блока кода сохраняются пустые строки, а ### и --- не разметка
+    in_code = False
     
     for i, line in enumerate(lines):
         line_stripped = line.strip()
         
         # Основной заголовок раздела (##)
-        if line.startswith('##') and not line.startswith('###'):
+        if is_section_header(line):
             # Сохраняем предыдущий раздел
             if current_section["title"]:
                 sections.append(current_section.copy())
             
             # Начинаем новый раздел
-            title = line.replace('##', '').strip()
-            title = re.sub(r'[0-9️⃣1️⃣2️⃣3️⃣4️⃣5️⃣6️⃣7️⃣8️⃣9️⃣🔟]', '', title).strip()
-            title = re.sub(r'^\d+\.\s*', '', title)
-            current_section = {"title": title, "subsections": [], "content": []}
+            current_section = {"title": section_title(line), "subsections": [], "content": []}
             current_subsection = None
+            in_code = False
         
         # Подзаголовок (###)
-        elif line.startswith('###'):
+        elif line.startswith('###') and not in_code:
             if current_subsection:
                 current_section["subsections"].append(current_subsection)
             current_subsection = {
@@ -53,7 +74,9 @@ def parse_markdown_sections(md_content):
             }
         
         # Обычный контент
-        elif line_stripped and not line.startswith('---'):
+        elif in_code or (line_stripped and not line.startswith('---')):
+            if line_stripped.startswith('```'):
+                in_code = not in_code
             if current_subsection:
                 current_subsection["content"].append(line)
             else:
@@ -88,18 +111,11 @@ def clean_markdown_text(text, keep_emoji=True):
 def extract_bullets(content_lines):
     """Извлекает маркированные списки из контента"""
     bullets = []
-    skip_next = False
     
-    for i, line in enumerate(content_lines):
+    # Блоки кода идут отдельными слайдами, в список не попадают
+    for line in extract_code_blocks(content_lines)[1]:
         line = line.strip()
-        if not line or line.startswith('---') or line.startswith('```'):
-            skip_next = line.startswith('```')
-            continue
-        
-        if skip_next and not line.startswith('```'):
-            continue
-        elif line.startswith('```'):
-            skip_next = False
+        if not line or line.startswith('---'):
             continue
         
         # Маркированный список
@@ -137,6 +153,30 @@ def parse_table(content_lines):
                 table_data.append(cells)
     return table_data if len(table_data) > 1 else None
 
+def extract_code_blocks(content_lines):
+    """Извлекает блоки кода ```: список пар (язык, код) и строки вне блоков"""
+    blocks = []
+    text_lines = []
+    fence = None
+    for line in content_lines:
+        stripped = line.strip()
+        if fence is None:
+            if stripped.startswith('```'):
+                # Отступ ограждения снимается со строк кода (блок в списке)
+                fence = (stripped[3:].strip().split(' ')[0].lower(), len(line) - len(line.lstrip()), [])
+            else:
+                text_lines.append(line)
+        elif stripped.startswith('```'):
+            blocks.append(fence)
+            fence = None
+        else:
+            indent = min(fence[1], len(line) - len(line.lstrip(' ')))
+            fence[2].append(line[indent:].expandtabs(4).rstrip())
+    if fence is not None:
+        # Незакрытый блок продолжается до конца раздела
+        blocks.append(fence)
+    return [(language, '\n'.join(lines).strip('\n')) for language, _, lines in blocks], text_lines
+
 def create_slide_with_bullets(prs, title, bullets, max_bullets=7):
     """Создает слайд с маркированным списком"""
     slide_layout = prs.slide_layouts[1]
@@ -202,40 +242,101 @@ def create_slide_with_table(prs, title, table_data):
     title_paragraph.font.color.rgb = COLORS['primary']
     
     # Создаем таблицу
-    if table_data:
-        rows = len(table_data)
-        cols = len(table_data[0]) if table_data else 0
-        
-        if rows > 0 and cols > 0:
-            # Ограничиваем размер таблицы для читаемости
-            max_rows = min(rows, 8)
-            max_cols = min(cols, 5)
-            
-            table = slide.shapes.add_table(
-                max_rows, max_cols,
-                Inches(0.5), Inches(1.2),
-                Inches(9), Inches(4)
-            ).table
-            
-            # Заполняем таблицу
-            for i, row in enumerate(table_data[:max_rows]):
-                for j, cell_text in enumerate(row[:max_cols]):
-                    if i < max_rows and j < max_cols:
-                        cell = table.cell(i, j)
-                        cell.text = clean_markdown_text(cell_text)
-                        cell.text_frame.paragraphs[0].font.size = Pt(11)
-                        cell.text_frame.paragraphs[0].font.color.rgb = COLORS['text']
-                        cell.text_frame.word_wrap = True
-                        
-                        # Заголовок таблицы (первая строка)
-                        if i == 0:
-                            cell.text_frame.paragraphs[0].font.bold = True
-                            cell.fill.solid()
-                            cell.fill.fore_color.rgb = COLORS['primary']
-                            cell.text_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)
+    add_table_to_slide(slide, table_data)
     
     return slide
 
+# Управляющие символы и символы, недопустимые в XML 1.0
+_XML_CONTROL_CHARS_RE = re.compile('[\x00-\x08\x0b-\x1f]')
+_XML_INVALID_CHARS_RE = re.compile('[\ud800-\udfff\ufffe\uffff]')
+
+def _xml_text(text):
+    """Текст для элемента <a:t> в XML, собранном строкой.
+
+    Управляющие символы записываются как _xHHHH_ (так же делает python-pptx
+    при присваивании text), остальные недопустимые в XML символы отбрасываются.
+    """
+    from xml.sax.saxutils import escape
+    text = _XML_INVALID_CHARS_RE.sub('', escape(text))
+    return _XML_CONTROL_CHARS_RE.sub(lambda match: '_x%04X_' % ord(match.group()), text)
+
+# Таблица: наибольший размер для читаемости, кегль и стиль таблицы шаблона
+TABLE_MAX_ROWS = 8
+TABLE_MAX_COLS = 5
+TABLE_FONT_SIZE = 11
+TABLE_STYLE_ID = '{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}'
+
+# Оформление строк таблицы: первая строка - заголовок, остальные - данные
+TABLE_ROW_STYLES = {
+    "header": {"bold": True, "color": RGBColor(255, 255, 255), "fill": COLORS['primary']},
+    "body": {"bold": False, "color": COLORS['text'], "fill": None},
+}
+
+def _table_row_template(style):
+    """Начало и конец XML ячейки с оформлением строки; между ними - текст ячейки"""
+    bold = ' b="1"' if style["bold"] else ''
+    fill = f'<a:solidFill><a:srgbClr val="{style["fill"]}"/></a:solidFill>' if style["fill"] else ''
+    head = (
+        '<a:tc><a:txBody><a:bodyPr wrap="square"/><a:lstStyle/><a:p><a:pPr>'
+        f'<a:defRPr sz="{TABLE_FONT_SIZE * 100}"{bold}>'
+        f'<a:solidFill><a:srgbClr val="{style["color"]}"/></a:solidFill></a:defRPr></a:pPr>'
+    )
+    tail = f'</a:p></a:txBody><a:tcPr>{fill}</a:tcPr></a:tc>' if fill else '</a:p></a:txBody><a:tcPr/></a:tc>'
+    return head, tail
+
+def _table_xml(shape_id, table_data, x, y, cx, cy):
+    """XML рамки с таблицей, построенный одной строкой по строкам таблицы.
+
+    Оформление задается шаблоном строки (заголовок или данные), а не
+    свойствами каждой ячейки через объекты python-pptx. Размеры сетки
+    делятся так же, как в python-pptx: остаток от деления достается
+    последней строке и последнему столбцу.
+    """
+    rows, cols = len(table_data), len(table_data[0])
+    col_width, row_height = cx // cols, cy // rows
+    grid = ''.join(
+        f'<a:gridCol w="{col_width if j < cols - 1 else cx - (cols - 1) * col_width}"/>' for j in range(cols)
+    )
+    empty_cell = '<a:tc><a:txBody><a:bodyPr/><a:lstStyle/><a:p/></a:txBody><a:tcPr/></a:tc>'
+    templates = [_table_row_template(TABLE_ROW_STYLES["header"]), _table_row_template(TABLE_ROW_STYLES["body"])]
+    xml_rows = []
+    for i, row in enumerate(table_data):
+        head, tail = templates[0 if i == 0 else 1]
+        texts = [clean_markdown_text(cell) for cell in row[:cols]]
+        cells = ''.join(
+            f'{head}<a:r><a:t>{_xml_text(text)}</a:t></a:r>{tail}' if text else f'{head}{tail}'
+            for text in texts
+        )
+        height = row_height if i < rows - 1 else cy - (rows - 1) * row_height
+        xml_rows.append(f'<a:tr h="{height}">{cells}{empty_cell * (cols - len(texts))}</a:tr>')
+    return (
+        '<p:graphicFrame xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+        ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<p:nvGraphicFramePr><p:cNvPr id="{shape_id}" name="Table {shape_id - 1}"/>'
+        '<p:cNvGraphicFramePr><a:graphicFrameLocks noGrp="1"/></p:cNvGraphicFramePr><p:nvPr/></p:nvGraphicFramePr>'
+        f'<p:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></p:xfrm>'
+        '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/table">'
+        f'<a:tbl><a:tblPr firstRow="1" bandRow="1"><a:tableStyleId>{TABLE_STYLE_ID}</a:tableStyleId></a:tblPr>'
+        f'<a:tblGrid>{grid}</a:tblGrid>{"".join(xml_rows)}</a:tbl>'
+        '</a:graphicData></a:graphic></p:graphicFrame>'
+    )
+
+def add_table_to_slide(slide, table_data):
+    """Добавляет на слайд оформленную таблицу из разобранных строк"""
+    if not table_data or not table_data[0]:
+        return
+    from pptx.oxml import parse_xml
+    
+    # Ограничиваем размер таблицы для читаемости
+    rows = [row[:TABLE_MAX_COLS] for row in table_data[:TABLE_MAX_ROWS]]
+    spTree = slide.shapes._spTree
+    graphic_frame = parse_xml(_table_xml(
+        slide.shapes._next_shape_id, rows,
+        Inches(0.5), Inches(1.2), Inches(9), Inches(4),
+    ))
+    spTree.insert_element_before(graphic_frame, 'p:extLst')
+
 def create_title_slide(prs, title, subtitle=""):
     """Создает титульный слайд"""
     slide_layout = prs.slide_layouts[0]
@@ -275,8 +376,218 @@ def create_content_slide(prs, title, content_text):
     tf = content_shape.text_frame
     tf.word_wrap = True
     tf.text = clean_markdown_text(content_text)
-    tf.paragraphs[0].font.size = Pt(18)
-    tf.paragraphs[0].font.color.rgb = COLORS['text']
+    # Все строки одного кегля: по нему текст разбивается на слайды
+    for paragraph in tf.paragraphs:
+        paragraph.font.size = Pt(CONTENT_FONT_SIZE)
+        paragraph.font.color.rgb = COLORS['text']
+    
+    return slide
+
+# Оформление слайдов кода: моноширинный шрифт, кегль и фон области кода
+CODE_FONT = 'Consolas'
+CODE_FONT_SIZE = 14
+CODE_BACKGROUND = RGBColor(245, 247, 250)
+
+# Цвета токенов подсветки по типам Pygments; тип без цвета наследует
+# цвет ближайшего родительского типа
+CODE_TOKEN_COLORS = {
+    'Keyword': '0000CC',
+    'Name.Builtin': '7A3E9D',
+    'Name.Function': '795E26',
+    'Name.Class': '267F99',
+    'Name.Decorator': 'AF00DB',
+    'Literal.String': 'A31515',
+    'Literal.Number': '098658',
+    'Comment': '008000',
+    'Operator.Word': '0000CC',
+}
+
+class CodeHighlighter:
+    """Подсветка синтаксиса блоков кода с кэшем в памяти и на диске.
+
+    Результат - строки кода, каждая из которых - список пар (текст, цвет в
+    hex или None для цвета текста по умолчанию). Кэш ключуется языком и
+    хэшем кода, поэтому повторяющиеся фрагменты размечаются один раз за
+    процесс, а при заданном cache_dir - один раз вообще. Без Pygments или
+    для неизвестного языка код выводится без подсветки; такой результат на
+    диск не пишется, а версия Pygments входит в ключ дискового кэша.
+    """
+
+    # Версия формата разметки: входит в ключ дискового кэша
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._cache = {}
+
+    def highlight(self, code, language=""):
+        """Размечает код по токенам (с кэшированием)"""
+        if not language:
+            # Без языка подсветки нет, кэшировать нечего
+            return [[(line, None)] for line in code.split('\n')]
+        import hashlib
+        key = (language, hashlib.sha1(code.encode('utf-8')).hexdigest())
+        lines = self._cache.get(key)
+        if lines is None:
+            lines = self._load(key)
+            if lines is None:
+                lines = self._tokenize(code, language)
+                if lines is None:
+                    lines = [[(line, None)] for line in code.split('\n')]
+                else:
+                    self._store(key, lines)
+            self._cache[key] = lines
+        return lines
+
+    def _cache_file(self, key):
+        import hashlib
+        import os
+        try:
+            from pygments import __version__ as pygments_version
+        except ImportError:
+            pygments_version = None
+        # Цвета и версия Pygments входят в ключ: разметка хранится уже с
+        # цветами токенов, а лексеры меняются между версиями
+        colors = ','.join(f"{k}={v}" for k, v in sorted(CODE_TOKEN_COLORS.items()))
+        name = hashlib.sha1(
+            f"{self.CACHE_VERSION}:{pygments_version}:{colors}:{key[0]}:{key[1]}".encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"highlight-{name}.json")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        import json
+        try:
+            with open(self._cache_file(key), 'r', encoding='utf-8') as f:
+                return [[tuple(run) for run in line] for line in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _store(self, key, lines):
+        if not self.cache_dir:
+            return
+        import json
+        import os
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_file(key), 'w', encoding='utf-8') as f:
+                json.dump(lines, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _tokenize(code, language):
+        """Строки с цветами токенов или None, если подсветка недоступна"""
+        try:
+            from pygments.lexers import get_lexer_by_name
+            from pygments.util import ClassNotFound
+        except ImportError:
+            return None
+        try:
+            lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False) if language else None
+        except ClassNotFound:
+            lexer = None
+        if lexer is None:
+            return None
+        
+        lines = [[]]
+        for ttype, value in lexer.get_tokens(code):
+            color = None
+            while ttype is not None and color is None:
+                color = CODE_TOKEN_COLORS.get(str(ttype)[len('Token.'):])
+                ttype = ttype.parent
+            for i, part in enumerate(value.split('\n')):
+                if i:
+                    lines.append([])
+                if not part:
+                    continue
+                line = lines[-1]
+                # Соседние токены одного цвета объединяются в один фрагмент
+                if line and line[-1][1] == color:
+                    line[-1] = (line[-1][0] + part, color)
+                else:
+                    line.append((part, color))
+        return lines
+
+# Подсветка создается при первом использовании (см. configure_code_highlighter)
+_CODE_HIGHLIGHTER = None
+
+def get_code_highlighter():
+    """Возвращает подсветку кода, создавая ее при первом обращении.
+
+    Дисковый кэш включается только явно: каталогом в переменной
+    MD2PPTX_CODE_CACHE или через configure_code_highlighter. Иначе каждый
+    новый фрагмент недоверенного ввода оставлял бы файл на диске.
+    """
+    global _CODE_HIGHLIGHTER
+    if _CODE_HIGHLIGHTER is None:
+        import os
+        _CODE_HIGHLIGHTER = CodeHighlighter(os.environ.get('MD2PPTX_CODE_CACHE') or None)
+    return _CODE_HIGHLIGHTER
+
+def configure_code_highlighter(cache_dir=None):
+    """Задает каталог дискового кэша подсветки (None - только кэш в памяти)"""
+    global _CODE_HIGHLIGHTER
+    _CODE_HIGHLIGHTER = CodeHighlighter(cache_dir)
+    return _CODE_HIGHLIGHTER
+
+def _code_paragraphs_xml(lines):
+    """XML абзацев кода: по абзацу на строку и по фрагменту на цветной токен.
+
+    Разметка строится одной строкой и разбирается за один вызов, а не
+    через объекты python-pptx для каждого фрагмента.
+    """
+    text_color = str(COLORS['text'])
+    size = CODE_FONT_SIZE * 100
+    paragraphs = []
+    for line in lines:
+        runs = ''.join(
+            f'<a:r><a:rPr lang="en-US" sz="{size}" dirty="0">'
+            f'<a:solidFill><a:srgbClr val="{color or text_color}"/></a:solidFill>'
+            f'<a:latin typeface="{CODE_FONT}"/><a:cs typeface="{CODE_FONT}"/></a:rPr>'
+            f'<a:t>{_xml_text(text)}</a:t></a:r>'
+            for text, color in line
+        )
+        paragraphs.append(f'<a:p>{runs}<a:endParaRPr lang="en-US" sz="{size}" dirty="0"/></a:p>')
+    return ''.join(paragraphs)
+
+def _fill_code(shape, code, language=""):
+    """Заменяет абзацы текстовой рамки подсвеченными строками кода"""
+    from pptx.oxml import parse_xml
+    body = shape.text_frame._txBody
+    for p in body.p_lst:
+        body.remove(p)
+    lines = get_code_highlighter().highlight(code, language)
+    wrapper = parse_xml(
+        '<a:txBody xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+        f'{_code_paragraphs_xml(lines)}</a:txBody>'
+    )
+    body.extend(list(wrapper))
+
+def create_code_slide(prs, title, code, language=""):
+    """Создает слайд с блоком кода"""
+    slide_layout = prs.slide_layouts[5]
+    slide = prs.slides.add_slide(slide_layout)
+    
+    # Заголовок (как на слайде с таблицей)
+    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.8))
+    title_frame = title_box.text_frame
+    title_frame.text = clean_markdown_text(title)
+    title_paragraph = title_frame.paragraphs[0]
+    title_paragraph.font.size = Pt(32)
+    title_paragraph.font.bold = True
+    title_paragraph.font.color.rgb = COLORS['primary']
+    
+    # Область кода на светлом фоне
+    code_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.2), Inches(9), Inches(4.1))
+    code_box.fill.solid()
+    code_box.fill.fore_color.rgb = CODE_BACKGROUND
+    code_frame = code_box.text_frame
+    code_frame.word_wrap = True
+    code_frame.margin_left = code_frame.margin_right = Inches(0.2)
+    code_frame.margin_top = code_frame.margin_bottom = Inches(0.1)
+    _fill_code(code_box, code, language)
     
     return slide
 
@@ -293,7 +604,11 @@ def should_combine_sections(section1, section2):
     return False
 
 def optimize_sections(sections):
-    """Оптимизирует разделы, объединяя короткие"""
+    """Оптимизирует разделы, объединяя короткие.
+
+    Объединенный раздел хранит заголовки исходных разделов ## в
+    "source_titles": по ним строятся ключи его слайдов (plan_slide_entries).
+    """
     optimized = []
     i = 0
     
@@ -306,7 +621,8 @@ def optimize_sections(sections):
             combined = {
                 "title": f"{current['title']} / {next_section['title']}",
                 "subsections": current.get("subsections", []) + next_section.get("subsections", []),
-                "content": current.get("content", []) + next_section.get("content", [])
+                "content": current.get("content", []) + next_section.get("content", []),
+                "source_titles": [current["title"], next_section["title"]],
             }
             optimized.append(combined)
             i += 2
@@ -316,156 +632,1927 @@ def optimize_sections(sections):
     
     return optimized
 
-def convert_markdown_to_pptx(input_file, output_file=None):
-    """Конвертирует Markdown файл в PowerPoint презентацию"""
-    if output_file is None:
-        # Генерируем имя выходного файла на основе входного
+class MarkdownParseSession:
+    """Сессия инкрементального разбора Markdown для живого предпросмотра.
+
+    Хранит строки документа и индекс начал разделов ##. При правке диапазона
+    строк заново разбираются только затронутые разделы, а результат всегда
+    совпадает с parse_markdown_sections для текущего текста.
+    """
+
+    def __init__(self, md_content=""):
+        self.lines = md_content.split('\n')
+        # Блок - строки от одного заголовка ## до следующего; первый блок
+        # может быть вступлением без заголовка. Для каждого блока хранится
+        # номер первой строки и разобранный раздел (None, если раздела нет)
+        self._starts = self._split_blocks(0, len(self.lines))
+        self._sections = [self._parse_block(i) for i in range(len(self._starts))]
+        self._optimized = None
+
+    @property
+    def text(self):
+        """Текущий текст документа"""
+        return '\n'.join(self.lines)
+
+    @property
+    def sections(self):
+        """Разделы, как их вернул бы parse_markdown_sections"""
+        return [section for section in self._sections if section is not None]
+
+    @property
+    def optimized_sections(self):
+        """Разделы после optimize_sections (пересчитываются лениво после правок)"""
+        if self._optimized is None:
+            self._optimized = optimize_sections(self.sections)
+        return self._optimized
+
+    def block_at(self, line_number):
+        """Номер блока, содержащего строку"""
+        import bisect
+        return max(0, bisect.bisect_right(self._starts, line_number) - 1)
+
+    def apply_edit(self, start_line, end_line, new_lines):
+        """Заменяет строки [start_line, end_line) на new_lines и обновляет разделы.
+
+        new_lines - список строк или текст, который разбивается по переводам
+        строк. Возвращает диапазон номеров блоков, разобранных заново.
+        """
+        if isinstance(new_lines, str):
+            new_lines = new_lines.split('\n')
+        start_line = max(0, min(start_line, len(self.lines)))
+        end_line = max(start_line, min(end_line, len(self.lines)))
+        
+        first = self.block_at(start_line)
+        last = self.block_at(max(start_line, end_line - 1))
+        region_start = self._starts[first]
+        region_end = self._block_end(last)
+        
+        self.lines[start_line:end_line] = new_lines
+        delta = len(new_lines) - (end_line - start_line)
+        region_end += delta
+        
+        # Если правка убрала заголовок, строки блока продолжают предыдущий раздел
+        if first > 0 and not (region_start < len(self.lines) and is_section_header(self.lines[region_start])):
+            first -= 1
+            region_start = self._starts[first]
+        
+        new_starts = self._split_blocks(region_start, region_end)
+        tail = [start + delta for start in self._starts[last + 1:]]
+        self._starts[first:] = new_starts + tail
+        self._sections[first:last + 1] = [None] * len(new_starts)
+        for index in range(first, first + len(new_starts)):
+            self._sections[index] = self._parse_block(index)
+        if not self._starts:
+            # Документ стал пустым
+            self._starts, self._sections = [0], [None]
+        self._optimized = None
+        return range(first, first + len(new_starts))
+
+    def _block_end(self, index):
+        """Номер строки, следующей за последней строкой блока"""
+        return self._starts[index + 1] if index + 1 < len(self._starts) else len(self.lines)
+
+    def _split_blocks(self, start, end):
+        """Начала блоков в диапазоне строк [start, end)"""
+        starts = [start] if start < end else []
+        starts.extend(i for i in range(start + 1, end) if is_section_header(self.lines[i]))
+        return starts
+
+    def _parse_block(self, index):
+        """Разбирает один блок так же, как parse_markdown_sections"""
+        start, end = self._starts[index], self._block_end(index)
+        if start >= len(self.lines) or not is_section_header(self.lines[start]):
+            return None
+        section = {"title": section_title(self.lines[start]), "subsections": [], "content": []}
+        current_subsection = None
+        in_code = False
+        for line in self.lines[start + 1:end]:
+            if line.startswith('###') and not in_code:
+                if current_subsection:
+                    section["subsections"].append(current_subsection)
+                current_subsection = {"title": line.replace('###', '').strip(), "content": []}
+            elif in_code or (line.strip() and not line.startswith('---')):
+                if line.strip().startswith('```'):
+                    in_code = not in_code
+                if current_subsection:
+                    current_subsection["content"].append(line)
+                else:
+                    section["content"].append(line)
+        # Как и в parse_markdown_sections, незакрытый подраздел сохраняется
+        # только у последнего раздела документа
+        if current_subsection and end == len(self.lines):
+            section["subsections"].append(current_subsection)
+        return section if section["title"] else None
+
+# Ширины символов шрифта Calibri (шрифт темы шаблона по умолчанию) в тысячных
+# долях кегля. Используются, когда файл шрифта не указан. Латиница, цифры, знаки
+# и кириллица, совпадающая по начертанию с латиницей, взяты из таблицы ширин
+# Calibri; остальная кириллица оценена с точностью около 5%. Для точных
+# метрик укажите файл шрифта (--font)
+_CALIBRI_WIDTH_ROWS = (
+    # Латиница, строчные
+    ('abcdefghijklmnopqrstuvwxyz', (479, 525, 423, 525, 498, 305, 471, 525, 229, 239, 455, 229, 799, 525, 527, 525, 525, 349, 391, 335, 525, 452, 715, 433, 453, 395,)),
+    # Латиница, прописные
+    ('ABCDEFGHIJKLMNOPQRSTUVWXYZ', (579, 544, 533, 615, 488, 459, 631, 623, 252, 319, 520, 420, 855, 646, 662, 517, 673, 543, 459, 487, 642, 567, 890, 519, 487, 468,)),
+    ('0123456789', (507, 507, 507, 507, 507, 507, 507, 507, 507, 507,)),
+    (' .,:;\'"!?`-_()[]{}/\\|*#$%&@+<=>~^', (226, 252, 250, 268, 268, 221, 401, 326, 463, 282, 306, 498, 303, 303, 307, 307, 344, 344, 386, 386, 460, 498, 498, 507, 715, 682, 894, 498, 498, 498, 498, 498, 498,)),
+    # Кириллица, совпадающая с латиницей
+    ('аеосрух', (479, 498, 527, 423, 525, 453, 433,)),
+    ('АВЕКМНОРСТХ', (579, 544, 488, 520, 855, 623, 662, 517, 533, 487, 519,)),
+    ('ёЁ', (498, 488,)),
+    # Кириллица, оценки
+    ('бвгджзийклмнптфцчшщъыьэюя', (527, 486, 385, 530, 704, 420, 546, 546, 463, 520, 664, 538, 530, 412, 691, 548, 500, 790, 801, 560, 692, 480, 433, 740, 499,)),
+    ('БГДЖЗИЙЛПУФЦЧШЩЪЫЬЭЮЯ', (544, 420, 620, 853, 480, 646, 646, 610, 623, 525, 735, 649, 585, 905, 918, 640, 790, 541, 533, 915, 547,)),
+)
+
+def _width_table(rows):
+    """Словарь ширин символов в долях кегля; символ не может повторяться"""
+    widths = {}
+    for chars, values in rows:
+        if len(chars) != len(values):
+            raise ValueError(f"Число ширин не совпадает с числом символов: {chars!r}")
+        for char, value in zip(chars, values):
+            if char in widths:
+                raise ValueError(f"Ширина символа {char!r} задана дважды")
+            widths[char] = value / 1000
+    return widths
+
+CALIBRI_WIDTHS = _width_table(_CALIBRI_WIDTH_ROWS)
+
+# Диапазоны символов, ширины которых измеряются по файлу шрифта
+_MEASURED_RANGES = ((0x20, 0x7F), (0xA0, 0x100), (0x400, 0x460), (0x2010, 0x2040))
+
+class FontMetrics:
+    """Таблица ширин символов шрифта для измерения текста без отрисовки.
+
+    Ширины хранятся в долях кегля; ширины слов кэшируются, поэтому
+    повторяющиеся слова измеряются один раз.
+    """
+
+    def __init__(self, widths, default_width=0.55, wide_width=1.0):
+        self.widths = widths
+        self.default_width = default_width
+        # Эмодзи и другие символы вне основных плоскостей шире обычных
+        self.wide_width = wide_width
+        self._word_widths = {}
+
+    @classmethod
+    def from_font_file(cls, path, cache_dir=None):
+        """Строит таблицу по TTF/OTF файлу (через Pillow) и кэширует ее на диске"""
+        import hashlib
+        import json
         import os
-        base_name = os.path.splitext(os.path.basename(input_file))[0]
-        output_file = f"{base_name}.pptx"
+        
+        stat = os.stat(path)
+        key = hashlib.sha1(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime}".encode('utf-8')).hexdigest()
+        cache_dir = cache_dir or os.path.join(os.path.expanduser('~'), '.cache', 'md2pptx')
+        cache_file = os.path.join(cache_dir, f"metrics-{key}.json")
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data["widths"], data["default_width"])
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        from PIL import ImageFont
+        font = ImageFont.truetype(path, 1000)
+        widths = {}
+        for start, stop in _MEASURED_RANGES:
+            for code in range(start, stop):
+                widths[chr(code)] = round(font.getlength(chr(code)) / 1000, 4)
+        default_width = round(sum(widths.values()) / len(widths), 4)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({"widths": widths, "default_width": default_width}, f, ensure_ascii=False)
+        except OSError:
+            pass
+        return cls(widths, default_width)
+
+    def char_width(self, char):
+        """Ширина символа в долях кегля"""
+        width = self.widths.get(char)
+        if width is not None:
+            return width
+        code = ord(char)
+        if 0xFE00 <= code <= 0xFE0F or 0x200B <= code <= 0x200D or 0x20E3 == code:
+            # Селекторы вариантов и соединители не занимают места
+            return 0.0
+        return self.wide_width if code >= 0x1F000 else self.default_width
+
+    def word_width(self, word):
+        """Ширина слова в долях кегля (с кэшированием)"""
+        width = self._word_widths.get(word)
+        if width is None:
+            width = sum(map(self.char_width, word))
+            self._word_widths[word] = width
+        return width
+
+    def count_lines(self, text, width_pt, size_pt):
+        """Число строк, которое займет текст при переносе по словам.
+
+        Как и PowerPoint, переносит по пробелам, а слишком длинные слова
+        разрывает посимвольно. Перевод строки начинает новую строку.
+        """
+        limit = width_pt / size_pt
+        space = self.char_width(' ')
+        lines = 0
+        for part in text.split('\n'):
+            lines += 1
+            used = 0.0
+            for word in part.split():
+                width = self.word_width(word)
+                if used and used + space + width > limit:
+                    lines += 1
+                    used = 0.0
+                if width > limit:
+                    # Длинное слово занимает несколько строк целиком
+                    extra = int(width // limit)
+                    lines += extra
+                    width -= extra * limit
+                used += (space if used else 0.0) + width
+        return lines
+
+class TextFitter:
+    """Разбивает абзацы на слайды по измеренной высоте текста.
+
+    Размеры области текста берутся из макета шаблона с учетом того, что
+    слайд 16:9 ниже макета 4:3. Высота абзаца считается как число строк
+    на межстрочный интервал плюс отступы до и после абзаца.
+    """
+
+    # Межстрочный интервал в долях кегля и отступ перед абзацем из bodyStyle
+    LINE_SPACING = 1.2
+    SPACE_BEFORE = 0.2
+
+    def __init__(self, metrics, width_pt, height_pt):
+        self.metrics = metrics
+        self.width_pt = width_pt
+        self.height_pt = height_pt
+
+    @classmethod
+    def for_template(cls, metrics=None):
+        """Создает раскладчик по области контента макета 1 шаблона"""
+        prs = new_presentation()
+        body = prs.slide_layouts[1].placeholders[1]
+        bottom = min(body.top + body.height, prs.slide_height)
+        # Поля текстовой рамки: по 0.5" слева и справа (как в
+        # create_slide_with_bullets), отступ маркера 0.375", 0.05" сверху и снизу
+        width = body.width - Inches(1) - Inches(0.375)
+        height = bottom - body.top - Inches(0.1)
+        return cls(metrics or FontMetrics(CALIBRI_WIDTHS), width / 12700, height / 12700)
+
+    def paragraph_height(self, text, size_pt, space_after_pt=0):
+        """Высота абзаца в пунктах"""
+        lines = self.metrics.count_lines(text, self.width_pt, size_pt)
+        line = size_pt * self.LINE_SPACING
+        return lines * line + line * self.SPACE_BEFORE + space_after_pt
+
+    def paginate(self, paragraphs, size_pt, space_after_pt=0):
+        """Делит абзацы на группы, каждая из которых помещается на слайд"""
+        pages = []
+        current, used = [], 0.0
+        for text in paragraphs:
+            height = self.paragraph_height(text, size_pt, space_after_pt)
+            if current and used + height > self.height_pt:
+                pages.append(current)
+                current, used = [], 0.0
+            current.append(text)
+            used += height
+        if current:
+            pages.append(current)
+        return pages
+
+# Раскладчик создается при первом использовании (см. configure_text_fitter)
+_TEXT_FITTER = None
+
+def get_text_fitter():
+    """Возвращает раскладчик текста, создавая его при первом обращении"""
+    global _TEXT_FITTER
+    if _TEXT_FITTER is None:
+        _TEXT_FITTER = TextFitter.for_template()
+    return _TEXT_FITTER
+
+def configure_text_fitter(font_file=None):
+    """Задает шрифт для измерения текста (None - встроенные метрики Calibri)"""
+    global _TEXT_FITTER
+    metrics = FontMetrics.from_font_file(font_file) if font_file else None
+    _TEXT_FITTER = TextFitter.for_template(metrics)
+    return _TEXT_FITTER
+
+# Правила выбора обработчика раздела по заголовку.
+# Порядок правил задает приоритет: при совпадении нескольких побеждает первое.
+DEFAULT_SECTION_RULES = [
+    {
+        "name": "intro",
+        "keywords": ["Введение"],
+        "handler": "intro",
+        "slide_title": "Введение",
+        "subsections": [
+            {"name": "mission", "keywords": ["Миссия"], "prefix": "🎯 ", "limit": 2},
+            {"name": "product", "keywords": ["Продукт"], "prefix": "\n💡 ", "limit": 5},
+            {"name": "market", "keywords": ["Рынок"], "prefix": "\n📊 ", "limit": 2},
+        ],
+    },
+    {
+        "name": "cases",
+        "keywords": ["кейс"],
+        "ignore_case": True,
+        "handler": "cases",
+        "group_size": 2,
+        "bullets_per_item": 3,
+    },
+]
+
+class KeywordAutomaton:
+    """Автомат Ахо-Корасик для поиска ключевых слов за один проход по тексту.
+
+    Каждому ключевому слову сопоставлен приоритет (номер правила); поиск
+    возвращает наименьший приоритет среди найденных слов. Время поиска
+    зависит от длины текста, а не от числа ключевых слов.
+    """
+
+    NONE = float('inf')
+
+    def __init__(self, keywords):
+        # keywords - пары (ключевое слово, приоритет)
+        self.goto = [{}]
+        self.out = [self.NONE]
+        for keyword, priority in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.out.append(self.NONE)
+                state = next_state
+            self.out[state] = min(self.out[state], priority)
+        # Ссылки неудач строятся обходом в ширину; приоритет состояния
+        # включает приоритеты всех слов, оканчивающихся в нем
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.out[next_state] = min(self.out[next_state], self.out[self.fail[next_state]])
+                queue.append(next_state)
+
+        # Переходы с учетом ссылок неудач запоминаются при первом проходе
+        # по символу, поэтому поиск не ходит по ссылкам повторно
+        self._delta = [dict(edges) for edges in self.goto]
+
+    def _step(self, state, char):
+        """Переход автомата по символу с учетом ссылок неудач"""
+        origin = state
+        while state and char not in self.goto[state]:
+            state = self.fail[state]
+        target = self.goto[state].get(char, 0)
+        self._delta[origin][char] = target
+        return target
+
+    def search(self, text, stop_at=0):
+        """Наименьший приоритет найденного слова (NONE, если слов нет).
+
+        Поиск прекращается, как только найдено слово с приоритетом stop_at.
+        """
+        delta, out, step = self._delta, self.out, self._step
+        best = self.NONE
+        state = 0
+        for char in text:
+            next_state = delta[state].get(char)
+            state = step(state, char) if next_state is None else next_state
+            if out[state] < best:
+                best = out[state]
+                if best <= stop_at:
+                    break
+        return best
+
+class KeywordScan:
+    """Поиск небольшого числа ключевых слов прямой проверкой вхождения.
+
+    Для нескольких слов оператор in быстрее прохода автомата; интерфейс
+    такой же, как у KeywordAutomaton.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted(keywords, key=lambda item: item[1])
+
+    def search(self, text, stop_at=0):
+        """Наименьший приоритет найденного слова (KeywordAutomaton.NONE, если слов нет)"""
+        for keyword, priority in self.keywords:
+            if keyword in text:
+                return priority
+        return KeywordAutomaton.NONE
+
+# Наибольшее число ключевых слов, при котором KeywordScan быстрее автомата
+DIRECT_SCAN_KEYWORDS = 32
+
+def keyword_matcher(keywords):
+    """Выбирает способ поиска ключевых слов по их количеству"""
+    if len(keywords) <= DIRECT_SCAN_KEYWORDS:
+        return KeywordScan(keywords)
+    return KeywordAutomaton(keywords)
+
+class SectionRuleSet:
+    """Набор правил, скомпилированный для быстрого выбора по заголовку.
+
+    Ключевые слова с учетом регистра и без него ищутся отдельно. Если слов
+    много, они собираются в автомат Ахо-Корасик, и заголовок просматривается
+    один раз независимо от числа правил; до DIRECT_SCAN_KEYWORDS слов
+    проверяются прямым вхождением (KeywordScan). Регулярные выражения правил
+    ("pattern") проверяются отдельно и только если могут перебить найденное
+    правило.
+    """
+
+    def __init__(self, rules):
+        self.rules = [dict(rule) for rule in rules]
+        exact, folded = [], []
+        self._patterns = []
+        for index, rule in enumerate(self.rules):
+            keywords = rule.get("keywords", [])
+            if not keywords and not rule.get("pattern"):
+                raise ValueError(f"Правило {rule.get('name', index)!r} не содержит ключевых слов")
+            if rule.get("handler", "default") not in SECTION_HANDLERS:
+                raise ValueError(f"Неизвестный обработчик раздела: {rule['handler']}")
+            if rule.get("ignore_case"):
+                folded.extend((keyword.casefold(), index) for keyword in keywords)
+            else:
+                exact.extend((keyword, index) for keyword in keywords)
+            if rule.get("pattern"):
+                flags = re.IGNORECASE if rule.get("ignore_case") else 0
+                try:
+                    self._patterns.append((index, re.compile(rule["pattern"], flags)))
+                except re.error as e:
+                    raise ValueError(f"Некорректный шаблон в правиле {rule.get('name', index)!r}: {e}") from e
+            if rule.get("subsections"):
+                rule["subsection_rules"] = SectionRuleSet(rule["subsections"])
+        self._exact = keyword_matcher(exact) if exact else None
+        self._folded = keyword_matcher(folded) if folded else None
+
+    def match(self, text):
+        """Возвращает правило с наивысшим приоритетом, совпавшее с текстом"""
+        if not text:
+            return None
+        best = KeywordAutomaton.NONE
+        if self._exact is not None:
+            best = self._exact.search(text)
+        if self._folded is not None and best > 0:
+            best = min(best, self._folded.search(text.casefold(), 0))
+        for index, pattern in self._patterns:
+            if index >= best:
+                break
+            if pattern.search(text):
+                best = index
+                break
+        return self.rules[best] if best != KeywordAutomaton.NONE else None
+
+def load_section_rules(path, include_defaults=True):
+    """Загружает правила разделов из JSON файла.
+
+    Файл содержит список правил или объект с ключом "rules". Правила из файла
+    имеют приоритет над встроенными.
+    """
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    rules = config.get("rules", []) if isinstance(config, dict) else config
+    if include_defaults:
+        rules = list(rules) + DEFAULT_SECTION_RULES
+    return SectionRuleSet(rules)
+
+def slide_spec(kind, **kwargs):
+    """Описание слайда для плана: вид слайда и аргументы его конструктора"""
+    return {"kind": kind, **kwargs}
+
+# Кегль и отступ после абзаца на слайдах списков и текста (как в create_*)
+BULLET_FONT_SIZE = 16
+BULLET_SPACE_AFTER = 6
+CONTENT_FONT_SIZE = 18
+
+def bullet_slides(title, bullets):
+    """Планирует слайды списка, перенося на следующие пункты, которые не помещаются"""
+    slides = []
+    for i, chunk in enumerate(get_text_fitter().paginate(bullets, BULLET_FONT_SIZE, BULLET_SPACE_AFTER)):
+        slide_title = title if i == 0 else f"{title} (продолжение)"
+        slides.append(slide_spec("bullets", title=slide_title, bullets=chunk, max_bullets=len(chunk)))
+    return slides
+
+def content_slides(title, lines):
+    """Планирует текстовые слайды, перенося не поместившиеся строки"""
+    # Очищаем текст целиком, чтобы блоки кода удалялись вместе с ограждениями
+    cleaned = clean_markdown_text('\n'.join(lines)).split('\n')
+    slides = []
+    for i, chunk in enumerate(get_text_fitter().paginate(cleaned, CONTENT_FONT_SIZE)):
+        slide_title = title if i == 0 else f"{title} (продолжение)"
+        slides.append(slide_spec("content", title=slide_title, content_text='\n'.join(chunk)))
+    return slides
+
+# Символов в строке и строк на слайде кода: область 9" x 4.1" без полей,
+# ширина символа моноширинного шрифта - 0.55 кегля
+CODE_COLUMNS = int((9 - 0.4) * 72 / (CODE_FONT_SIZE * 0.55))
+CODE_ROWS = int((4.1 - 0.2) * 72 / (CODE_FONT_SIZE * TextFitter.LINE_SPACING))
+
+def code_slides(title, code, language=""):
+    """Планирует слайды блока кода, перенося строки, которые не помещаются"""
+    slides = []
+    chunk, rows = [], 0
+    for line in code.split('\n'):
+        # Длинная строка переносится и занимает несколько строк слайда
+        height = max(1, -(-len(line) // CODE_COLUMNS))
+        if chunk and rows + height > CODE_ROWS:
+            slides.append(chunk)
+            chunk, rows = [], 0
+        chunk.append(line)
+        rows += height
+    if chunk:
+        slides.append(chunk)
+    return [
+        slide_spec("code", title=title if i == 0 else f"{title} (продолжение)",
+                   code='\n'.join(chunk), language=language)
+        for i, chunk in enumerate(slides)
+    ]
+
+def section_code_slides(title, content_lines):
+    """Слайды всех блоков кода из строк раздела"""
+    slides = []
+    for language, code in extract_code_blocks(content_lines)[0]:
+        if code.strip():
+            slides.extend(code_slides(title, code, language))
+    return slides
+
+def handle_intro_section(section, rule):
+    """Планирует слайд введения из подразделов (миссия, продукт, рынок)"""
+    title = section["title"]
+    content = section.get("content", [])
+    subsection_rules = rule.get("subsection_rules")
     
-    # Читаем Markdown файл
-    with open(input_file, 'r', encoding='utf-8') as f:
-        md_content = f.read()
+    intro_bullets = []
+    for sub in section.get("subsections", []):
+        sub_rule = subsection_rules.match(sub['title']) if subsection_rules else None
+        if sub_rule:
+            intro_bullets.append(f"{sub_rule.get('prefix', '')}{sub['title']}")
+            intro_bullets.extend(extract_bullets(sub['content'])[:sub_rule.get("limit", 2)])
+    
+    # Блоки кода раздела и подразделов идут отдельными слайдами
+    code = section_code_slides(title, content)
+    for sub in section.get("subsections", []):
+        code.extend(section_code_slides(f"{title}: {sub['title']}", sub['content']))
+    
+    if intro_bullets:
+        return bullet_slides(rule.get("slide_title", title), intro_bullets) + code
+    if content:
+        bullets = extract_bullets(content)
+        if bullets:
+            return bullet_slides(title, bullets) + code
+    return code
+
+def handle_case_section(section, rule):
+    """Планирует кейсы, группируя подразделы по несколько на слайд"""
+    title = section["title"]
+    subsections = section.get("subsections", [])
+    if not subsections:
+        return handle_default_section(section, rule)
+    
+    slides = []
+    group_size = rule.get("group_size", 2)
+    per_item = rule.get("bullets_per_item", 3)
+    for i in range(0, len(subsections), group_size):
+        group = subsections[i:i + group_size]
+        if len(group) > 1:
+            # Несколько кейсов на одном слайде
+            combined_bullets = []
+            for j, sub in enumerate(group):
+                if j:
+                    # Разделитель
+                    combined_bullets.append("")
+                combined_bullets.append(f"📌 {sub['title']}")
+                combined_bullets.extend(extract_bullets(sub['content'])[:per_item])
+            slides.extend(bullet_slides(title, combined_bullets))
+        else:
+            # Последний одиночный кейс
+            sub = group[0]
+            bullets = extract_bullets(sub['content'])
+            if bullets:
+                slides.extend(bullet_slides(f"{title}: {sub['title']}", bullets))
+        # Блоки кода кейсов идут после их слайда
+        for sub in group:
+            slides.extend(section_code_slides(f"{title}: {sub['title']}", sub['content']))
+    return slides
+
+def handle_default_section(section, rule=None):
+    """Планирует слайды раздела: по подразделу на слайд, таблицу или список"""
+    title = section["title"]
+    content = section.get("content", [])
+    subsections = section.get("subsections", [])
+    
+    # Пропускаем пустые разделы
+    if not title:
+        return []
+    
+    # Если есть подразделы, создаем отдельные слайды
+    if subsections:
+        slides = []
+        for sub in subsections:
+            sub_title = f"{title}: {sub['title']}"
+            bullets = extract_bullets(sub['content'])
+            if bullets:
+                slides.extend(bullet_slides(sub_title, bullets))
+            slides.extend(section_code_slides(sub_title, sub['content']))
+        return slides
+    
+    # Блоки кода идут отдельными слайдами после текста раздела
+    code = section_code_slides(title, content)
     
-    # Создаем презентацию
-    prs = Presentation()
+    # Проверяем, есть ли таблица
+    table_data = parse_table(content)
+    if table_data:
+        return [slide_spec("table", title=title, table_data=table_data)] + code
+    
+    # Обычный слайд со списком, разбитый на слайды по высоте текста
+    bullets = extract_bullets(content)
+    if bullets:
+        return bullet_slides(title, bullets) + code
+    text_lines = extract_code_blocks(content)[1]
+    if any(line.strip() for line in text_lines):
+        # Текстовые слайды
+        return content_slides(title, text_lines) + code
+    return code
+
+# Обработчики, на которые ссылаются правила по имени
+SECTION_HANDLERS = {
+    "intro": handle_intro_section,
+    "cases": handle_case_section,
+    "default": handle_default_section,
+}
+
+DEFAULT_SECTION_RULESET = SectionRuleSet(DEFAULT_SECTION_RULES)
+
+# Конструкторы слайдов по виду из плана
+SLIDE_BUILDERS = {
+    "title": create_title_slide,
+    "bullets": create_slide_with_bullets,
+    "table": create_slide_with_table,
+    "content": create_content_slide,
+    "code": create_code_slide,
+}
+
+def plan_section_slides(section, ruleset=None):
+    """Выбирает обработчик раздела по правилам и возвращает план его слайдов"""
+    ruleset = ruleset or DEFAULT_SECTION_RULESET
+    rule = ruleset.match(section["title"])
+    handler = SECTION_HANDLERS[rule.get("handler", "default")] if rule else handle_default_section
+    return handler(section, rule)
+
+def plan_presentation(sections, ruleset=None):
+    """Строит план презентации: список пар (раздел, слайды раздела)"""
+    return [(section, plan_section_slides(section, ruleset)) for section in sections]
+
+class SlideSkeletons:
+    """Заранее оформленные заготовки слайдов каждого вида.
+
+    Заготовка один раз строится функциями create_* в служебной презентации
+    из того же шаблона. Новый слайд получает глубокую копию ее дерева фигур,
+    в которой заменяется только текст, поэтому оформление шрифтов, отступов
+    и переносов не повторяется для каждого слайда.
+    """
+
+    # Макет шаблона для каждого вида слайда (как в функциях create_*)
+    LAYOUTS = {"title": 0, "bullets": 1, "content": 1, "table": 5, "code": 5}
+
+    def __init__(self):
+        scratch = new_presentation()
+        self.trees = {
+            "title": self._tree(create_title_slide(scratch, "T", "S")),
+            "content": self._tree(create_content_slide(scratch, "T", "C")),
+            "table": self._tree(create_slide_with_table(scratch, "T", None)),
+            "code": self._tree(create_code_slide(scratch, "T", "")),
+        }
+        # Для списка храним отдельно образцы абзацев: пункт и заметку о
+        # пропущенных пунктах, а в дереве оставляем пустое тело
+        bullets = create_slide_with_bullets(scratch, "T", ["B", "B"], max_bullets=1)
+        body = bullets.placeholders[1].text_frame._txBody
+        self.bullet_paragraph, self.more_paragraph = [copy.deepcopy(p) for p in body.p_lst]
+        for p in body.p_lst:
+            body.remove(p)
+        self.trees["bullets"] = self._tree(bullets)
+
+    @staticmethod
+    def _tree(slide):
+        return copy.deepcopy(slide._element.cSld.spTree)
+
+    def new_slide(self, prs, kind):
+        """Добавляет в презентацию слайд-копию заготовки"""
+        layout = prs.slide_layouts[self.LAYOUTS[kind]]
+        rId, slide = _add_slide_part(prs, layout)
+        spTree = slide._element.cSld.spTree
+        spTree.getparent().replace(spTree, copy.deepcopy(self.trees[kind]))
+        prs.slides._sldIdLst.add_sldId(rId)
+        return slide
+
+    def title_slide(self, prs, title, subtitle=""):
+        slide = self.new_slide(prs, "title")
+        _fill_text(slide.shapes.title, clean_markdown_text(title))
+        _fill_text(slide.placeholders[1], clean_markdown_text(subtitle) if subtitle else "")
+        return slide
+
+    def bullets_slide(self, prs, title, bullets, max_bullets=7):
+        slide = self.new_slide(prs, "bullets")
+        _fill_text(slide.shapes.title, clean_markdown_text(title))
+        tf = slide.placeholders[1].text_frame
+        body = tf._txBody
+        for bullet in bullets[:max_bullets]:
+            p = copy.deepcopy(self.bullet_paragraph)
+            body.append(p)
+            paragraph = _Paragraph(p, tf)
+            paragraph.text = bullet
+            # Выделяем ключевые слова жирным
+            if '**' in bullet:
+                paragraph.font.bold = True
+        # Если есть еще пункты, добавляем заметку
+        if len(bullets) > max_bullets:
+            p = copy.deepcopy(self.more_paragraph)
+            body.append(p)
+            _Paragraph(p, tf).text = f"... и еще {len(bullets) - max_bullets} пунктов"
+        if not body.p_lst:
+            body.add_p()
+        return slide
+
+    def table_slide(self, prs, title, table_data):
+        slide = self.new_slide(prs, "table")
+        # Заголовок таблицы - текстовое поле, а не плейсхолдер макета
+        title_box = next(shape for shape in slide.shapes if not shape.is_placeholder)
+        _fill_text(title_box, clean_markdown_text(title))
+        add_table_to_slide(slide, table_data)
+        return slide
+
+    def code_slide(self, prs, title, code, language=""):
+        slide = self.new_slide(prs, "code")
+        title_box, code_box = [shape for shape in slide.shapes if not shape.is_placeholder]
+        _fill_text(title_box, clean_markdown_text(title))
+        _fill_code(code_box, code, language)
+        return slide
+
+    def content_slide(self, prs, title, content_text):
+        slide = self.new_slide(prs, "content")
+        _fill_text(slide.shapes.title, clean_markdown_text(title))
+        _fill_text(slide.placeholders[1], clean_markdown_text(content_text), style_all=True)
+        return slide
+
+def _add_slide_part(prs, layout):
+    """Создает часть нового слайда и связывает ее с презентацией.
+
+    PresentationPart.add_slide перед добавлением связи ищет такую же среди
+    всех связей презентации, что делает сборку больших презентаций
+    квадратичной. Новый слайд еще ни с чем не связан, поэтому в python-pptx
+    1.x связь добавляется напрямую.
+    """
+    presentation_part = prs.part
+    rels = presentation_part.rels
+    if not hasattr(rels, '_add_relationship'):
+        return presentation_part.add_slide(layout)
+    partname = presentation_part._next_slide_partname
+    slide_part = SlidePart.new(partname, presentation_part.package, layout.part)
+    rId = rels._add_relationship(RT.SLIDE, slide_part)
+    return rId, slide_part.slide
+
+def _fill_text(shape, text, style_all=False):
+    """Заменяет текст фигуры заготовки, сохраняя оформление первого абзаца.
+
+    Повторяет TextFrame.text: каждая строка становится абзацем, а
+    оформление заготовки есть только у первого из них, если style_all не
+    требует скопировать его во все абзацы.
+    """
+    tf = shape.text_frame
+    body = tf._txBody
+    first, *rest = body.p_lst
+    for p in rest:
+        body.remove(p)
+    lines = text.split('\n')
+    _Paragraph(first, tf).text = lines[0]
+    for line in lines[1:]:
+        p = body.add_p()
+        if style_all and first.pPr is not None:
+            p.insert(0, copy.deepcopy(first.pPr))
+        p.append_text(line)
+
+# Заготовки создаются один раз за процесс при первом использовании
+_SKELETONS = None
+
+def get_slide_skeletons():
+    """Возвращает заготовки слайдов, создавая их при первом обращении"""
+    global _SKELETONS
+    if _SKELETONS is None:
+        _SKELETONS = SlideSkeletons()
+    return _SKELETONS
+
+def render_slide(prs, spec):
+    """Создает слайд по описанию из плана копированием заготовки"""
+    args = {key: value for key, value in spec.items() if key != "kind"}
+    skeletons = get_slide_skeletons()
+    builder = getattr(skeletons, f"{spec['kind']}_slide", None)
+    if builder is None:
+        return SLIDE_BUILDERS[spec["kind"]](prs, **args)
+    return builder(prs, **args)
+
+# Шаблон по умолчанию, сериализованный один раз за процесс
+_TEMPLATE_BYTES = None
+
+def _template_bytes():
+    """Шаблон по умолчанию, сериализованный при первом обращении"""
+    global _TEMPLATE_BYTES
+    if _TEMPLATE_BYTES is None:
+        import io
+        buffer = io.BytesIO()
+        Presentation().save(buffer)
+        _TEMPLATE_BYTES = buffer.getvalue()
+    return _TEMPLATE_BYTES
+
+def warm_up():
+    """Загружает шаблон и заготовки слайдов заранее (используется демоном)"""
+    _template_bytes()
+    get_slide_skeletons()
+
+def new_presentation():
+    """Создает пустую презентацию формата 16:9"""
+    import io
+    prs = Presentation(io.BytesIO(_template_bytes()))
     prs.slide_width = Inches(10)
     prs.slide_height = Inches(5.625)
+    return prs
+
+def _resolve_ruleset(rules):
+    """Приводит правила (None, список или SectionRuleSet) к SectionRuleSet"""
+    if rules is None:
+        return DEFAULT_SECTION_RULESET
+    if isinstance(rules, SectionRuleSet):
+        return rules
+    return SectionRuleSet(rules)
+
+# Путь "-" означает stdin для входа и stdout для выхода
+STDIO_PATH = '-'
+
+def _default_output_file(input_file):
+    """Имя выходного файла по умолчанию на основе входного"""
+    import os
+    if input_file == STDIO_PATH:
+        return STDIO_PATH
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    return f"{base_name}.pptx"
+
+def read_markdown(input_file):
+    """Читает Markdown из файла или из stdin, если путь равен STDIO_PATH"""
+    if input_file == STDIO_PATH:
+        stream = getattr(sys.stdin, 'buffer', None)
+        return stream.read().decode('utf-8') if stream else sys.stdin.read()
+    with open(input_file, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def save_presentation(prs, output_file):
+    """Сохраняет презентацию в файл или в stdout (в бинарном режиме), если путь равен STDIO_PATH"""
+    if output_file != STDIO_PATH:
+        prs.save(output_file)
+        return
+    import io
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    stream = getattr(sys.stdout, 'buffer', sys.stdout)
+    stream.write(buffer.getvalue())
+    stream.flush()
+
+class LimitExceeded(ValueError):
+    """Превышен лимит ресурсов конвертации (см. ResourceLimits)"""
+
+    def __init__(self, limit, value, maximum):
+        super().__init__(f"превышен лимит {limit}: {value} при максимуме {maximum}")
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+    def __reduce__(self):
+        # Исключение передается из процессов пула при сборке по манифесту
+        return (LimitExceeded, (self.limit, self.value, self.maximum))
+
+    def to_dict(self):
+        """Структурированное описание ошибки для сервисов"""
+        return {"error": "limit_exceeded", "limit": self.limit, "value": self.value, "maximum": self.maximum}
+
+class ResourceLimits:
+    """Лимиты ресурсов одной конвертации для недоверенного ввода.
+
+    Незаданный лимит (None) не проверяется. В режиме "error" превышение
+    сразу прерывает конвертацию исключением LimitExceeded, в режиме
+    "truncate" вход сокращается до лимита, а в конец презентации добавляется
+    слайд с предупреждением. Проверки выполняются на границах этапов, а
+    время - перед каждым разделом и слайдом.
+    """
+
+    MODES = ("error", "truncate")
+    WARNING_TITLE = "⚠️ Презентация сокращена"
+
+    def __init__(self, max_input_bytes=None, max_line_length=None, max_sections=None,
+                 max_table_cells=None, max_slides=None, time_budget=None, on_limit="error"):
+        if on_limit not in self.MODES:
+            raise ValueError(f"Неизвестный режим лимитов: {on_limit}")
+        self.max_input_bytes = max_input_bytes
+        self.max_line_length = max_line_length
+        self.max_sections = max_sections
+        self.max_table_cells = max_table_cells
+        self.max_slides = max_slides
+        self.time_budget = time_budget
+        self.on_limit = on_limit
+        self.deadline = None
+        self.expired = False
+        self.warnings = []
+
+    def start(self):
+        """Начинает отсчет времени и сбрасывает предупреждения"""
+        import time
+        self.deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        self.expired = False
+        self.warnings = []
+        return self
+
+    def exceeded(self, limit, value, maximum):
+        """Обрабатывает превышение лимита: исключение или предупреждение"""
+        error = LimitExceeded(limit, value, maximum)
+        if self.on_limit == "error":
+            raise error
+        self.warnings.append(error.to_dict())
+
+    def check_time(self):
+        """Проверяет бюджет времени; True, если работу нужно прекратить"""
+        if self.deadline is None or self.expired:
+            return self.expired
+        import time
+        now = time.monotonic()
+        if now > self.deadline:
+            self.expired = True
+            self.exceeded("time_budget", round(now - self.deadline + self.time_budget, 3), self.time_budget)
+        return self.expired
+
+    def read(self, input_file):
+        """Читает Markdown, не загружая в память больше max_input_bytes"""
+        if self.max_input_bytes is None:
+            return read_markdown(input_file)
+        if input_file == STDIO_PATH:
+            stream = getattr(sys.stdin, 'buffer', None)
+            if stream is None:
+                data = sys.stdin.read(self.max_input_bytes + 1).encode('utf-8')
+            else:
+                data = stream.read(self.max_input_bytes + 1)
+        else:
+            with open(input_file, 'rb') as f:
+                data = f.read(self.max_input_bytes + 1)
+        if len(data) <= self.max_input_bytes:
+            return data.decode('utf-8')
+        self.exceeded("max_input_bytes", len(data), self.max_input_bytes)
+        data = data[:self.max_input_bytes]
+        # Обрезка могла разделить многобайтовый символ
+        for cut in range(4):
+            try:
+                return data[:len(data) - cut].decode('utf-8')
+            except UnicodeDecodeError:
+                if cut == 3:
+                    raise
+
+    def limit_lines(self, md_content):
+        """Ограничивает длину строк Markdown"""
+        if self.max_line_length is None:
+            return md_content
+        lines = md_content.split('\n')
+        longest = max(map(len, lines))
+        if longest <= self.max_line_length:
+            return md_content
+        self.exceeded("max_line_length", longest, self.max_line_length)
+        return '\n'.join(line[:self.max_line_length] for line in lines)
+
+    def limit_sections(self, sections):
+        """Ограничивает число разделов"""
+        if self.max_sections is None or len(sections) <= self.max_sections:
+            return sections
+        self.exceeded("max_sections", len(sections), self.max_sections)
+        return sections[:self.max_sections]
+
+    def limit_table(self, spec):
+        """Ограничивает число ячеек таблицы, отбрасывая последние строки"""
+        rows = spec["table_data"]
+        cells = sum(map(len, rows))
+        if self.max_table_cells is None or cells <= self.max_table_cells:
+            return spec
+        self.exceeded("max_table_cells", cells, self.max_table_cells)
+        kept, total = [], 0
+        for row in rows:
+            total += len(row)
+            if kept and total > self.max_table_cells:
+                break
+            kept.append(row)
+        return dict(spec, table_data=kept)
+
+    def limit_entries(self, entries):
+        """Ограничивает таблицы и общее число слайдов в плане"""
+        if self.max_table_cells is not None:
+            limited = []
+            for key, digest, spec in entries:
+                if spec["kind"] == "table":
+                    table_spec = self.limit_table(spec)
+                    if table_spec is not spec:
+                        digest, spec = _spec_digest(table_spec), table_spec
+                limited.append((key, digest, spec))
+            entries = limited
+        if self.max_slides is None:
+            return entries
+        # Слайд с предупреждением тоже входит в max_slides
+        total = len(entries) + (1 if self.warnings else 0)
+        if total <= self.max_slides:
+            return entries
+        self.exceeded("max_slides", total, self.max_slides)
+        return entries[:max(self.max_slides - 1, 0)]
+
+    def warning_entry(self):
+        """Элемент плана со слайдом-предупреждением или None без превышений"""
+        if not self.warnings:
+            return None
+        bullets = [
+            (f"{w['document']}: " if "document" in w else "") + f"{w['limit']}: {w['value']} при максимуме {w['maximum']}"
+            for w in self.warnings
+        ]
+        spec = slide_spec("bullets", title=self.WARNING_TITLE, bullets=bullets, max_bullets=len(bullets))
+        return ("limits", _spec_digest(spec), spec)
+
+def load_sections(input_file, limits=None):
+    """Читает Markdown файл и возвращает оптимизированный список разделов"""
+    if limits is None:
+        return optimize_sections(parse_markdown_sections(read_markdown(input_file)))
+    md_content = limits.limit_lines(limits.read(input_file))
+    return optimize_sections(limits.limit_sections(parse_markdown_sections(md_content)))
+
+def _main_title(sections):
+    """Заголовок титульного слайда: первый раздел или общий заголовок"""
+    return sections[0].get("title", "Презентация") if sections else "Презентация"
+
+def _spec_digest(spec):
+    """Хэш содержимого слайда для сравнения при обновлении"""
+    import hashlib
+    import json
+    data = json.dumps([SLIDE_FORMAT_VERSION, spec], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+def plan_slide_entries(sections, ruleset=None, title_slide=True, limits=None):
+    """Полный план слайдов с устойчивыми ключами: список (ключ, хэш, описание).
+
+    Ключ слайда строится из заголовков исходных разделов ## (с номером
+    повтора для одинаковых заголовков) и номера слайда внутри раздела, поэтому
+    правка одного раздела не меняет ключи остальных. У объединенных
+    optimize_sections разделов ключ перечисляет оба исходных раздела через
+    "+" (см. _key_sources). Хэш отражает содержимое слайда. При исчерпании
+    бюджета времени limits планирование останавливается.
+    """
+    import hashlib
+    
+    entries = []
+    if sections and title_slide:
+        spec = slide_spec("title", title=_main_title(sections))
+        entries.append(("title", _spec_digest(spec), spec))
+    seen = {}
+    for section in sections:
+        if limits is not None and limits.check_time():
+            break
+        slides = plan_section_slides(section, ruleset)
+        sources = []
+        for title in section.get("source_titles", [section["title"]]):
+            title_hash = hashlib.sha1(title.encode('utf-8')).hexdigest()[:8]
+            seen[title_hash] = seen.get(title_hash, 0) + 1
+            sources.append(f"{title_hash}.{seen[title_hash]}")
+        section_key = '+'.join(sources)
+        for i, spec in enumerate(slides):
+            entries.append((f"{section_key}.{i + 1}", _spec_digest(spec), spec))
+    return entries
+
+# Ключ слайда раздела: необязательный префикс главы, исходные разделы
+# (хэш заголовка и номер повтора) через "+" и номер слайда в разделе
+_SECTION_KEY_RE = re.compile(r'((?:ch\d+\.)?)([0-9a-f]{8}\.\d+(?:\+[0-9a-f]{8}\.\d+)*)\.(\d+)')
+
+def _key_sources(key):
+    """Исходные разделы и номер слайда из ключа plan_slide_entries.
+
+    Возвращает множество исходных разделов (с префиксом главы) и номер
+    слайда или None для служебных ключей (титульный слайд, глава, лимиты).
+    """
+    match = _SECTION_KEY_RE.fullmatch(key or '')
+    if match is None:
+        return None
+    prefix, sources, number = match.groups()
+    return {prefix + source for source in sources.split('+')}, int(number)
+
+def read_manifest(path):
+    """Читает манифест сборки из нескольких документов.
+
+    Манифест - JSON вида {"title": "...", "documents": [...]}, где документ -
+    путь к Markdown файлу или объект {"file": ..., "title": ...}. Пути
+    считаются относительно каталога манифеста. Возвращает заголовок и
+    список пар (путь, заголовок главы или None).
+    """
+    import errno
+    import json
+    import os
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    documents = []
+    for document in manifest.get("documents", []):
+        if isinstance(document, str):
+            document = {"file": document}
+        document_path = os.path.join(base, document["file"])
+        if not os.path.isfile(document_path):
+            raise FileNotFoundError(errno.ENOENT, "Документ манифеста не найден", document_path)
+        documents.append((document_path, document.get("title")))
+    if not documents:
+        raise ValueError(f"Манифест не содержит документов: {path}")
+    return manifest.get("title"), documents
+
+def is_manifest(input_file):
+    """Проверяет, является ли вход манифестом сборки (.json)"""
+    return isinstance(input_file, str) and input_file.lower().endswith('.json')
+
+def _plan_document(input_file, ruleset, fitter, limits=None):
+    """Разбирает документ и планирует его слайды (выполняется в отдельном процессе)"""
+    global _TEXT_FITTER
+    _TEXT_FITTER = fitter
+    if limits is not None:
+        # Свой список предупреждений для документа, как и в процессе пула
+        limits = copy.copy(limits)
+        limits.warnings = []
+    sections = load_sections(input_file, limits)
+    title = _main_title(sections) if sections else None
+    entries = plan_slide_entries(sections, ruleset, title_slide=False, limits=limits)
+    return title, entries, limits.warnings if limits is not None else []
+
+def plan_merged_entries(documents, title=None, ruleset=None, workers=None, limits=None):
+    """План одной презентации из нескольких документов.
+
+    Документы разбираются и планируются параллельно в пуле процессов.
+    Каждый документ становится главой с разделительным слайдом; ключи
+    слайдов главы получают префикс с ее номером. Лимиты limits на размер
+    входа, строки и разделы действуют для каждого документа отдельно.
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import repeat
     
-    # Парсим разделы
-    sections = parse_markdown_sections(md_content)
+    files = [path for path, _ in documents]
+    fitter = get_text_fitter()
+    if len(files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            planned = list(executor.map(_plan_document, files, repeat(ruleset), repeat(fitter), repeat(limits)))
+    else:
+        planned = [_plan_document(path, ruleset, fitter, limits) for path in files]
+    
+    chapters = []
+    for (path, chapter_title), (document_title, entries, warnings) in zip(documents, planned):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if limits is not None and warnings:
+            limits.warnings.extend(dict(warning, document=name) for warning in warnings)
+            limits.expired = limits.expired or any(w["limit"] == "time_budget" for w in warnings)
+        chapters.append((chapter_title or document_title or name, entries))
+    
+    spec = slide_spec("title", title=title or chapters[0][0])
+    result = [("title", _spec_digest(spec), spec)]
+    for n, (chapter_title, entries) in enumerate(chapters, 1):
+        spec = slide_spec("title", title=chapter_title, subtitle=f"Глава {n}")
+        result.append((f"ch{n}", _spec_digest(spec), spec))
+        result.extend((f"ch{n}.{key}", digest, spec) for key, digest, spec in entries)
+    return result
+
+def plan_input_entries(input_file, ruleset=None, workers=None, limits=None):
+    """План слайдов для одного файла, списка файлов или манифеста"""
+    if is_manifest(input_file):
+        title, documents = read_manifest(input_file)
+        entries = plan_merged_entries(documents, title, ruleset, workers, limits)
+    elif isinstance(input_file, (list, tuple)):
+        entries = plan_merged_entries([(path, None) for path in input_file], None, ruleset, workers, limits)
+    else:
+        entries = plan_slide_entries(load_sections(input_file, limits), ruleset, limits=limits)
+    if limits is not None:
+        entries = limits.limit_entries(entries)
+    return entries
+
+# Версия оформления слайдов: входит в хэш, чтобы смена оформления
+# обновляла все слайды в режиме --update
+SLIDE_FORMAT_VERSION = 3
+
+# Префикс имени слайда (атрибут name элемента p:cSld), в котором хранится
+# ключ и хэш слайда
+SLIDE_ID_PREFIX = 'md2pptx'
+
+def stamp_slide(slide, key, digest):
+    """Записывает в слайд его устойчивый ключ и хэш содержимого"""
+    slide._element.cSld.set('name', f"{SLIDE_ID_PREFIX}:{key}:{digest}")
+
+def convert_markdown_to_pptx(input_file, output_file=None, rules=None, workers=None, limits=None):
+    """Конвертирует Markdown файл в PowerPoint презентацию
+
+    input_file - путь к файлу, список путей или JSON манифест (см.
+    read_manifest); несколько документов собираются в одну презентацию по
+    главам. rules - правила выбора обработчиков разделов (список словарей
+    или SectionRuleSet); по умолчанию используются DEFAULT_SECTION_RULES.
+    workers - число процессов для разбора нескольких документов. limits -
+    ResourceLimits для недоверенного ввода; предупреждения о сокращении
+    остаются в limits.warnings.
+    """
+    if output_file is None:
+        # Генерируем имя выходного файла на основе входного
+        first = input_file[0] if isinstance(input_file, (list, tuple)) else input_file
+        output_file = _default_output_file(first)
     
-    # Оптимизируем разделы
-    sections = optimize_sections(sections)
+    if limits is not None:
+        limits.start()
     
-    # Создаем титульный слайд
-    if sections:
-        # Используем первый раздел как заголовок, или общий заголовок
-        main_title = sections[0].get("title", "Презентация") if sections else "Презентация"
-        create_title_slide(prs, main_title)
+    # Парсим разделы и планируем слайды
+    entries = plan_input_entries(input_file, _resolve_ruleset(rules), workers, limits)
     
-    # Обрабатываем разделы
-    for section in sections:
-        title = section["title"]
-        content = section.get("content", [])
-        subsections = section.get("subsections", [])
-        
-        # Обрабатываем раздел "Введение" отдельно
-        if "Введение" in title:
-            # Создаем слайд с миссией и продуктом
-            intro_bullets = []
-            for sub in subsections:
-                if "Миссия" in sub['title']:
-                    intro_bullets.append(f"🎯 {sub['title']}")
-                    intro_bullets.extend(extract_bullets(sub['content'])[:2])
-                elif "Продукт" in sub['title']:
-                    intro_bullets.append(f"\n💡 {sub['title']}")
-                    intro_bullets.extend(extract_bullets(sub['content'])[:5])
-                elif "Рынок" in sub['title']:
-                    intro_bullets.append(f"\n📊 {sub['title']}")
-                    intro_bullets.extend(extract_bullets(sub['content'])[:2])
-            
-            if intro_bullets:
-                create_slide_with_bullets(prs, "Введение", intro_bullets, max_bullets=10)
-            elif content:
-                bullets = extract_bullets(content)
-                if bullets:
-                    create_slide_with_bullets(prs, title, bullets)
-            continue
-        
-        # Пропускаем пустые разделы
-        if not title:
+    # Создаем презентацию: титульный слайд и слайды разделов
+    prs = new_presentation()
+    for key, digest, spec in entries:
+        if limits is not None and len(prs.slides) and limits.check_time():
+            break
+        stamp_slide(render_slide(prs, spec), key, digest)
+    
+    # Слайд с предупреждением о сработавших лимитах
+    warning = limits.warning_entry() if limits is not None else None
+    if warning:
+        key, digest, spec = warning
+        stamp_slide(render_slide(prs, spec), key, digest)
+    
+    # Сохраняем презентацию
+    save_presentation(prs, output_file)
+    return output_file, len(prs.slides)
+
+# Пространства имен и типы частей пакета .pptx для обновления на месте
+_NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_NS_CT = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_CT_SLIDE = 'application/vnd.openxmlformats-officedocument.presentationml.slide+xml'
+_SLIDE_NAME_RE = re.compile(rb'<p:cSld\b[^>]*?\sname="' + SLIDE_ID_PREFIX.encode() + rb':([^":]+):([0-9a-f]+)"')
+
+def _rels_name(partname):
+    """Имя части связей для части пакета (ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels)"""
+    import posixpath
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, '_rels', f"{name}.rels")
+
+def _resolve_target(partname, target):
+    """Абсолютное имя части по относительной ссылке из связей"""
+    import posixpath
+    return posixpath.normpath(posixpath.join(posixpath.dirname(partname), target))
+
+def _relative_target(partname, target):
+    """Относительная ссылка на часть target из части partname"""
+    import posixpath
+    return posixpath.relpath(target, posixpath.dirname(partname))
+
+def update_pptx(input_file, output_file, rules=None, workers=None, limits=None):
+    """Обновляет существующую презентацию, перезаписывая только изменившиеся слайды.
+
+    Слайды сопоставляются с разделами по ключу из plan_slide_entries,
+    записанному в слайд при создании. Неизменившиеся слайды, их заметки,
+    медиа и остальные части пакета копируются без повторной сериализации;
+    presentation.xml и связи переписываются, только если изменился состав
+    слайдов. Слайды без ключа (добавленные вручную) остаются после того
+    сгенерированного слайда, за которым шли. Возвращает путь, число слайдов
+    и число перезаписанных слайдов.
+    """
+    import os
+    import shutil
+    import tempfile
+    import zipfile
+    from lxml import etree
+    from pptx.opc.oxml import serialize_part_xml
+    
+    if limits is not None:
+        limits.start()
+    entries = plan_input_entries(input_file, _resolve_ruleset(rules), workers, limits)
+    warning = limits.warning_entry() if limits is not None else None
+    if warning:
+        entries.append(warning)
+    
+    with zipfile.ZipFile(output_file) as zin:
+        infos = zin.infolist()
+        parts = {info.filename: zin.read(info.filename) for info in infos}
+    
+    presentation_name = 'ppt/presentation.xml'
+    presentation = etree.fromstring(parts[presentation_name])
+    presentation_rels = etree.fromstring(parts[_rels_name(presentation_name)])
+    rel_targets = {
+        rel.get('Id'): _resolve_target(presentation_name, rel.get('Target'))
+        for rel in presentation_rels
+    }
+    sld_id_lst = presentation.find(f'{{{_NS_P}}}sldIdLst')
+    
+    # Существующие слайды по порядку: ключ, хэш и элемент sldId
+    existing = []
+    for sld_id in (list(sld_id_lst) if sld_id_lst is not None else []):
+        partname = rel_targets[sld_id.get(f'{{{_NS_R}}}id')]
+        match = _SLIDE_NAME_RE.search(parts[partname][:4096])
+        key, digest = (match.group(1).decode(), match.group(2).decode()) if match else (None, None)
+        existing.append({"key": key, "digest": digest, "sld_id": sld_id, "partname": partname})
+    
+    planned_keys = {key for key, _, _ in entries}
+    by_key = {}
+    orphans = []
+    seen_keys = set()
+    for slide in existing:
+        # Копии сгенерированных слайдов разбираются ниже как ручные
+        if slide["key"] is None or slide["key"] in seen_keys:
             continue
-        
-        # Если есть подразделы, создаем отдельные слайды
-        if subsections:
-            # Для кейсов использования - группируем по 2 кейса на слайд
-            if "Кейс" in title or "кейс" in title.lower():
-                for i in range(0, len(subsections), 2):
-                    if i + 1 < len(subsections):
-                        # Два кейса на одном слайде
-                        sub1 = subsections[i]
-                        sub2 = subsections[i + 1]
-                        combined_title = f"{title}"
-                        combined_bullets = []
-                        
-                        # Кейс 1
-                        combined_bullets.append(f"📌 {sub1['title']}")
-                        bullets1 = extract_bullets(sub1['content'])
-                        combined_bullets.extend(bullets1[:3])  # Первые 3 пункта
-                        
-                        # Разделитель
-                        combined_bullets.append("")
-                        
-                        # Кейс 2
-                        combined_bullets.append(f"📌 {sub2['title']}")
-                        bullets2 = extract_bullets(sub2['content'])
-                        combined_bullets.extend(bullets2[:3])  # Первые 3 пункта
-                        
-                        create_slide_with_bullets(prs, combined_title, combined_bullets, max_bullets=10)
-                    else:
-                        # Последний одиночный кейс
-                        sub = subsections[i]
-                        sub_title = f"{title}: {sub['title']}"
-                        bullets = extract_bullets(sub['content'])
-                        if bullets:
-                            create_slide_with_bullets(prs, sub_title, bullets)
-            else:
-                # Для других разделов - по одному подразделу на слайд
-                for sub in subsections:
-                    sub_title = f"{title}: {sub['title']}"
-                    bullets = extract_bullets(sub['content'])
-                    if bullets:
-                        create_slide_with_bullets(prs, sub_title, bullets)
+        seen_keys.add(slide["key"])
+        if slide["key"] in planned_keys:
+            by_key[slide["key"]] = slide
         else:
-            # Проверяем, есть ли таблица
-            table_data = parse_table(content)
-            if table_data:
-                create_slide_with_table(prs, title, table_data)
+            orphans.append(slide)
+    
+    # Слайд, ключа которого нет в плане, мог остаться от раздела, который
+    # optimize_sections теперь объединил с соседним (или перестал
+    # объединять). Такой слайд переходит к слайду плана с общим исходным
+    # разделом и тем же номером, чтобы сохранить его заметки
+    for key, _, _ in entries:
+        sources = _key_sources(key) if key not in by_key else None
+        if sources is None:
+            continue
+        for orphan in orphans:
+            orphan_sources = _key_sources(orphan["key"])
+            if orphan_sources and orphan_sources[1] == sources[1] and orphan_sources[0] & sources[0]:
+                by_key[key] = orphan
+                orphans.remove(orphan)
+                break
+    
+    # Ручные слайды привязываем к предыдущему сохраняемому слайду,
+    # слайды удаленных разделов не сохраняем
+    kept_slides = {id(slide) for slide in by_key.values()}
+    kept_keys = set()
+    manual = {None: []}
+    anchor = None
+    for slide in existing:
+        if id(slide) in kept_slides:
+            kept_keys.add(slide["key"])
+            anchor = id(slide)
+        elif slide["key"] is None or slide["key"] in kept_keys:
+            # Слайд без ключа или копия сгенерированного слайда
+            manual.setdefault(anchor, []).append(slide)
+    
+    # Части макетов по индексу в шаблоне (порядок sldLayoutIdLst мастера)
+    master_name = next(target for target in rel_targets.values() if '/slideMasters/' in target)
+    master = etree.fromstring(parts[master_name])
+    master_rels = {
+        rel.get('Id'): _resolve_target(master_name, rel.get('Target'))
+        for rel in etree.fromstring(parts[_rels_name(master_name)])
+    }
+    layouts = [master_rels[layout.get(f'{{{_NS_R}}}id')]
+               for layout in master.find(f'{{{_NS_P}}}sldLayoutIdLst')]
+    
+    scratch = None
+    changed = 0
+    new_order = list(manual[None])
+    new_parts = {}
+    next_slide_number = max([int(re.search(r'(\d+)\.xml$', s["partname"]).group(1)) for s in existing] + [0]) + 1
+    for key, digest, spec in entries:
+        slide = by_key.get(key)
+        anchored = manual.get(id(slide), []) if slide is not None else []
+        if slide is None or slide["digest"] != digest or slide["key"] != key:
+            # Слайд новый, его содержимое или ключ изменились - строим заново
+            scratch = scratch or new_presentation()
+            built = render_slide(scratch, spec)
+            stamp_slide(built, key, digest)
+            layout = layouts[SlideSkeletons.LAYOUTS[spec["kind"]]]
+            if slide is None:
+                partname = f"ppt/slides/slide{next_slide_number}.xml"
+                next_slide_number += 1
+                rels = etree.Element(f'{{{_NS_RELS}}}Relationships', nsmap={None: _NS_RELS})
+                etree.SubElement(rels, f'{{{_NS_RELS}}}Relationship', Id='rId1', Type=RT.SLIDE_LAYOUT,
+                                 Target=_relative_target(partname, layout))
+                slide = {"key": key, "digest": digest, "sld_id": None, "partname": partname}
             else:
-                # Обычный слайд со списком
-                bullets = extract_bullets(content)
-                if bullets:
-                    # Разбиваем на несколько слайдов если слишком много пунктов
-                    max_per_slide = 6
-                    for i in range(0, len(bullets), max_per_slide):
-                        chunk = bullets[i:i+max_per_slide]
-                        slide_title = title if i == 0 else f"{title} (продолжение)"
-                        create_slide_with_bullets(prs, slide_title, chunk, max_per_slide)
-                elif content:
-                    # Текстовый слайд
-                    content_text = '\n'.join(content[:5])  # Первые 5 строк
-                    create_content_slide(prs, title, content_text)
+                partname = slide["partname"]
+                rels = etree.fromstring(parts[_rels_name(partname)])
+                for rel in rels:
+                    if rel.get('Type') == RT.SLIDE_LAYOUT:
+                        rel.set('Target', _relative_target(partname, layout))
+            new_parts[partname] = serialize_part_xml(built._element)
+            new_parts[_rels_name(partname)] = serialize_part_xml(rels)
+            changed += 1
+        new_order.append(slide)
+        new_order.extend(anchored)
     
-    # Сохраняем презентацию
+    # Удаленные слайды вместе с их заметками
+    kept = {slide["partname"] for slide in new_order}
+    removed = set()
+    for slide in existing:
+        if slide["partname"] in kept:
+            continue
+        removed.update((slide["partname"], _rels_name(slide["partname"])))
+        for rel in etree.fromstring(parts.get(_rels_name(slide["partname"]), b'<r/>')):
+            if rel.get('Type') == RT.NOTES_SLIDE:
+                notes = _resolve_target(slide["partname"], rel.get('Target'))
+                removed.update((notes, _rels_name(notes)))
+    
+    # Состав или порядок слайдов изменился - переписываем presentation.xml,
+    # его связи и типы содержимого
+    if [slide["partname"] for slide in new_order] != [slide["partname"] for slide in existing]:
+        if sld_id_lst is None:
+            sld_id_lst = etree.SubElement(presentation, f'{{{_NS_P}}}sldIdLst')
+        for sld_id in list(sld_id_lst):
+            sld_id_lst.remove(sld_id)
+        for rel in list(presentation_rels):
+            if rel.get('Type') == RT.SLIDE and rel_targets[rel.get('Id')] not in kept:
+                presentation_rels.remove(rel)
+        used_rids = {rel.get('Id') for rel in presentation_rels}
+        next_id = max([int(s["sld_id"].get('id')) for s in existing if s["sld_id"] is not None] + [255]) + 1
+        content_types = etree.fromstring(parts['[Content_Types].xml'])
+        for override in list(content_types):
+            if override.get('PartName', '').lstrip('/') in removed:
+                content_types.remove(override)
+        for slide in new_order:
+            if slide["sld_id"] is None:
+                rid = next(f"rId{n}" for n in range(1, len(used_rids) + 2) if f"rId{n}" not in used_rids)
+                used_rids.add(rid)
+                etree.SubElement(presentation_rels, f'{{{_NS_RELS}}}Relationship', Id=rid, Type=RT.SLIDE,
+                                 Target=_relative_target(presentation_name, slide["partname"]))
+                etree.SubElement(content_types, f'{{{_NS_CT}}}Override',
+                                 PartName=f"/{slide['partname']}", ContentType=_CT_SLIDE)
+                slide["sld_id"] = etree.Element(f'{{{_NS_P}}}sldId', id=str(next_id))
+                slide["sld_id"].set(f'{{{_NS_R}}}id', rid)
+                next_id += 1
+            sld_id_lst.append(slide["sld_id"])
+        new_parts[presentation_name] = serialize_part_xml(presentation)
+        new_parts[_rels_name(presentation_name)] = serialize_part_xml(presentation_rels)
+        new_parts['[Content_Types].xml'] = serialize_part_xml(content_types)
+    
+    if not new_parts and not removed:
+        return output_file, len(new_order), 0
+    
+    # Пишем новый пакет рядом и атомарно заменяем исходный файл
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_file = tempfile.mkstemp(suffix='.pptx', dir=directory)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(tmp_file, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in infos:
+                if info.filename in removed:
+                    continue
+                zout.writestr(info, new_parts.pop(info.filename, parts[info.filename]),
+                              compress_type=zipfile.ZIP_DEFLATED)
+            for name, data in new_parts.items():
+                zout.writestr(name, data)
+        # mkstemp создает файл с правами 0600 - возвращаем права исходного
+        shutil.copymode(output_file, tmp_file)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+    return output_file, len(new_order), changed
+
+# Оценка размера слайда в упакованном .pptx: постоянная часть и байты текста
+SHARD_SLIDE_OVERHEAD_BYTES = 1500
+SHARD_BASE_BYTES = 30000
+
+def estimate_slide_bytes(spec):
+    """Грубо оценивает вклад слайда в размер упакованного .pptx"""
+    text = 0
+    for value in spec.values():
+        if isinstance(value, str):
+            text += len(value.encode('utf-8'))
+        elif isinstance(value, list):
+            for item in value:
+                cells = item if isinstance(item, list) else [item]
+                text += sum(len(str(cell).encode('utf-8')) for cell in cells)
+    return SHARD_SLIDE_OVERHEAD_BYTES + text
+
+def plan_shards(plan, max_slides=None, max_sections=None, max_bytes=None):
+    """Разбивает план презентации на части.
+
+    Части собираются из целых разделов; новая часть начинается, когда
+    следующий раздел превысил бы один из лимитов. Раздел, который сам по
+    себе больше лимита, делится по слайдам. Титульный слайд каждой части
+    в лимитах не учитывается.
+    """
+    for name, value in (("max_slides", max_slides), ("max_sections", max_sections), ("max_bytes", max_bytes)):
+        if value is not None and value <= 0:
+            raise ValueError(f"Лимит части {name} должен быть положительным: {value}")
+    shards = []
+    current = {"sections": [], "slides": [], "bytes": SHARD_BASE_BYTES}
+    
+    def fits(slide_count, byte_count, new_section):
+        if max_slides and len(current["slides"]) + slide_count > max_slides:
+            return False
+        if max_bytes and current["bytes"] + byte_count > max_bytes:
+            return False
+        if max_sections and new_section and len(current["sections"]) >= max_sections:
+            return False
+        return True
+    
+    def flush():
+        nonlocal current
+        if current["slides"]:
+            shards.append(current)
+        current = {"sections": [], "slides": [], "bytes": SHARD_BASE_BYTES}
+    
+    for section, slides in plan:
+        if not slides:
+            continue
+        sizes = [estimate_slide_bytes(spec) for spec in slides]
+        if not fits(len(slides), sum(sizes), True):
+            flush()
+        current["sections"].append(section["title"])
+        for spec, size in zip(slides, sizes):
+            # Раздел больше лимита целиком - переносим остаток в новую часть
+            if current["slides"] and not fits(1, size, False):
+                flush()
+                current["sections"].append(section["title"])
+            current["slides"].append(spec)
+            current["bytes"] += size
+    flush()
+    return shards
+
+def _build_shard(main_title, subtitle, slides, output_file):
+    """Собирает и сохраняет одну часть (выполняется в отдельном процессе)"""
+    prs = new_presentation()
+    render_slide(prs, slide_spec("title", title=main_title, subtitle=subtitle))
+    for spec in slides:
+        render_slide(prs, spec)
     prs.save(output_file)
     return output_file, len(prs.slides)
 
-def main():
-    """Основная функция для CLI использования"""
-    import sys
+def convert_markdown_to_sharded_pptx(input_file, output_file=None, max_slides=None,
+                                     max_sections=None, max_bytes=None, workers=None,
+                                     rules=None):
+    """Конвертирует Markdown в несколько .pptx файлов ограниченного размера
+
+    Части собираются параллельно в пуле процессов. Каждая часть начинается
+    с титульного слайда с номером части. Рядом с частями записывается
+    индекс <имя>_index.json; части от предыдущего запуска, не вошедшие в
+    новое разбиение, удаляются. Возвращает путь к индексу и список частей.
+    """
+    import glob
+    import json
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if output_file is None:
+        output_file = _default_output_file(input_file)
+    if output_file == STDIO_PATH:
+        raise ValueError("Разбиение на части требует имени выходного файла")
+    if is_manifest(input_file) or isinstance(input_file, (list, tuple)):
+        raise ValueError("Разбиение на части поддерживается только для одного документа")
+    base, ext = os.path.splitext(output_file)
+    
+    sections = load_sections(input_file)
+    plan = plan_presentation(sections, _resolve_ruleset(rules))
+    shards = plan_shards(plan, max_slides, max_sections, max_bytes)
+    main_title = _main_title(sections)
+    
+    files = [f"{base}_part{i + 1:02d}{ext or '.pptx'}" for i in range(len(shards))]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_build_shard, main_title, f"Часть {i + 1} из {len(shards)}",
+                            shard["slides"], files[i])
+            for i, shard in enumerate(shards)
+        ]
+        results = [future.result() for future in futures]
+    
+    # Удаляем лишние части прошлого разбиения, чтобы рядом с индексом
+    # остались только актуальные файлы
+    part_re = re.compile(re.escape(os.path.basename(base)) + r'_part\d{2,}' + re.escape(ext or '.pptx') + '$')
+    for stale in glob.glob(f"{glob.escape(base)}_part*{glob.escape(ext or '.pptx')}"):
+        if part_re.match(os.path.basename(stale)) and stale not in files:
+            os.remove(stale)
+    
+    index = {"source": input_file, "title": main_title, "shards": []}
+    for shard, (shard_file, slide_count) in zip(shards, results):
+        index["shards"].append({
+            "file": os.path.basename(shard_file),
+            "slides": slide_count,
+            "sections": list(dict.fromkeys(shard["sections"])),
+        })
+    index_file = f"{base}_index.json"
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return index_file, index["shards"]
+
+class MemoryProfile:
+    """Профиль памяти конвертации по этапам на основе tracemalloc.
+
+    Для каждого этапа записывается пик памяти внутри этапа, память,
+    оставшаяся занятой после него, и места, выделившие больше всего памяти
+    за этап (по разнице снимков до и после).
+    """
+
+    # Служебные выделения, которые не относятся к конвертации
+    IGNORED_FILES = ('<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>', '*tracemalloc.py')
+
+    def __init__(self, top=10, frames=1):
+        self.top = top
+        self.frames = frames
+        self.stages = []
+
+    def start(self):
+        """Включает трассировку выделений памяти"""
+        import tracemalloc
+        tracemalloc.start(self.frames)
+        return self
+
+    def stop(self):
+        """Выключает трассировку"""
+        import tracemalloc
+        tracemalloc.stop()
+
+    def _snapshot(self):
+        import tracemalloc
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in self.IGNORED_FILES]
+        )
+
+    def stage(self, name):
+        """Контекстный менеджер, измеряющий память одного этапа"""
+        import contextlib
+        import time
+        import tracemalloc
+
+        @contextlib.contextmanager
+        def measure():
+            before = self._snapshot()
+            start_current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            yield
+            elapsed = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            after = self._snapshot()
+            # compare_to сортирует по модулю разницы, освобождения отбрасываем до среза
+            grown = [stat for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0]
+            top = [
+                {
+                    "file": stat.traceback[0].filename,
+                    "line": stat.traceback[0].lineno,
+                    "size_bytes": stat.size_diff,
+                    "count": stat.count_diff,
+                }
+                for stat in grown[:self.top]
+            ]
+            self.stages.append({
+                "stage": name,
+                "seconds": round(elapsed, 4),
+                "peak_bytes": peak,
+                "peak_increase_bytes": peak - start_current,
+                "retained_bytes": current - start_current,
+                "top_allocations": top,
+            })
+
+        return measure()
+
+    def to_dict(self):
+        """Отчет по всем этапам для JSON"""
+        return {
+            "peak_bytes": max((stage["peak_bytes"] for stage in self.stages), default=0),
+            "stages": self.stages,
+        }
+
+def profile_conversion(input_file, output_file=None, rules=None, top=10, limits=None):
+    """Конвертирует Markdown файл, измеряя память этапов.
+
+    Этапы повторяют convert_markdown_to_pptx: разбор Markdown,
+    optimize_sections, построение слайдов (план и отрисовка) и сохранение.
+    Лимиты limits применяются так же, как при обычной конвертации.
+    Возвращает путь, число слайдов и отчет (словарь для JSON).
+    """
+    if output_file is None:
+        output_file = _default_output_file(input_file)
+    ruleset = _resolve_ruleset(rules)
+    if limits is not None:
+        limits.start()
+    profile = MemoryProfile(top).start()
+    try:
+        with profile.stage("parse"):
+            if limits is None:
+                sections = parse_markdown_sections(read_markdown(input_file))
+            else:
+                md_content = limits.limit_lines(limits.read(input_file))
+                sections = limits.limit_sections(parse_markdown_sections(md_content))
+        with profile.stage("optimize_sections"):
+            sections = optimize_sections(sections)
+        with profile.stage("build_slides"):
+            prs = new_presentation()
+            entries = plan_slide_entries(sections, ruleset, limits=limits)
+            if limits is not None:
+                entries = limits.limit_entries(entries)
+            for key, digest, spec in entries:
+                if limits is not None and len(prs.slides) and limits.check_time():
+                    break
+                stamp_slide(render_slide(prs, spec), key, digest)
+            warning = limits.warning_entry() if limits is not None else None
+            if warning:
+                key, digest, spec = warning
+                stamp_slide(render_slide(prs, spec), key, digest)
+        with profile.stage("save"):
+            save_presentation(prs, output_file)
+    finally:
+        profile.stop()
+    report = {"input": input_file, "output": output_file, "slides": len(prs.slides), **profile.to_dict()}
+    return output_file, len(prs.slides), report
+
+def _format_bytes(size):
+    """Размер в байтах для вывода человеку"""
+    if abs(size) < 1024:
+        return f"{size} Б"
+    for unit in ("КБ", "МБ"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} ГБ"
+
+# Коды возврата CLI
+EXIT_OK = 0
+EXIT_CONVERSION_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INPUT_ERROR = 3
+EXIT_OUTPUT_ERROR = 4
+EXIT_LIMIT_EXCEEDED = 5
+
+def _positive_int(value):
+    """Тип аргумента CLI: целое число больше нуля"""
+    import argparse
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается целое число: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"значение должно быть больше нуля: {value}")
+    return number
+
+def build_arg_parser():
+    """Парсер аргументов CLI"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Конвертер Markdown в PowerPoint")
+    parser.add_argument('input_file', nargs='?', help="входной Markdown файл, JSON манифест нескольких документов или - для stdin (по умолчанию PRESENTATION.md)")
+    parser.add_argument('output_file', nargs='?', help="выходной .pptx файл или - для stdout")
+    parser.add_argument('--rules', help="JSON файл с правилами обработки разделов")
+    parser.add_argument('--update', action='store_true', help="обновить существующий .pptx, перезаписав только изменившиеся слайды")
+    parser.add_argument('--font', help="TTF/OTF файл шрифта для измерения текста при разбиении на слайды")
+    parser.add_argument('--shard-slides', type=_positive_int, help="разбить на файлы не более чем по N слайдов")
+    parser.add_argument('--shard-sections', type=_positive_int, help="разбить на файлы не более чем по N разделов")
+    parser.add_argument('--shard-bytes', type=_positive_int, help="разбить на файлы размером примерно до N байт")
+    parser.add_argument('--workers', type=_positive_int, help="число процессов для сборки частей и разбора документов манифеста")
+    parser.add_argument('--max-input-bytes', type=_positive_int, help="лимит размера входного файла в байтах")
+    parser.add_argument('--max-line-length', type=_positive_int, help="лимит длины строки")
+    parser.add_argument('--max-sections', type=_positive_int, help="лимит числа разделов")
+    parser.add_argument('--max-table-cells', type=_positive_int, help="лимит числа ячеек одной таблицы")
+    parser.add_argument('--max-slides', type=_positive_int, help="лимит общего числа слайдов")
+    parser.add_argument('--time-budget', type=float, help="лимит времени конвертации в секундах")
+    parser.add_argument('--on-limit', choices=ResourceLimits.MODES, default="error",
+                        help="при превышении лимита: error - ошибка, truncate - сокращенная презентация")
+    parser.add_argument('--memprofile', metavar='JSON', help="измерить память по этапам (tracemalloc) и записать отчет в JSON файл")
+    parser.add_argument('--memprofile-top', type=_positive_int, default=10, help="число мест выделения памяти в отчете для каждого этапа")
+    parser.add_argument('--daemon', action='store_true', help="запустить фоновый процесс конвертации")
+    parser.add_argument('--socket', help="путь к Unix сокету демона")
+    parser.add_argument('--no-daemon', action='store_true', help="не использовать запущенный демон")
+    return parser
+
+def main(argv=None):
+    """Основная функция для CLI использования
+
+    Путь "-" означает stdin для входного файла и stdout для выходного; при
+    выводе в stdout сообщения о ходе работы пишутся в stderr. Коды возврата:
+    EXIT_OK, EXIT_CONVERSION_ERROR, EXIT_USAGE, EXIT_INPUT_ERROR,
+    EXIT_OUTPUT_ERROR, EXIT_LIMIT_EXCEEDED.
+    """
     import os
     
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    
+    if args.daemon:
+        from md_to_pptx_daemon import serve
+        serve(args.socket)
+        return
+    
+    if args.input_file:
+        input_file = args.input_file
+        output_file = args.output_file or _default_output_file(input_file)
     else:
         input_file = 'PRESENTATION.md'
         output_file = 'PRESENTATION.pptx'
     
-    if not os.path.exists(input_file):
-        print(f"❌ Ошибка: файл {input_file} не найден")
-        sys.exit(1)
+    # Если презентация идет в stdout, сообщения выводим в stderr
+    log = sys.stderr if output_file == STDIO_PATH else sys.stdout
+    sharded = args.shard_slides or args.shard_sections or args.shard_bytes
+    
+    if sharded and output_file == STDIO_PATH:
+        print("❌ Ошибка: разбиение на части несовместимо с выводом в stdout", file=sys.stderr)
+        sys.exit(EXIT_USAGE)
+    
+    if sharded and args.update:
+        print("❌ Ошибка: --update несовместим с разбиением на части", file=sys.stderr)
+        sys.exit(EXIT_USAGE)
+    
+    if args.memprofile and (sharded or args.update or is_manifest(input_file)):
+        print("❌ Ошибка: --memprofile поддерживается только для обычной конвертации одного файла", file=sys.stderr)
+        sys.exit(EXIT_USAGE)
+    
+    if input_file != STDIO_PATH and not os.path.exists(input_file):
+        print(f"❌ Ошибка: файл {input_file} не найден", file=sys.stderr)
+        sys.exit(EXIT_INPUT_ERROR)
+    
+    if is_manifest(input_file):
+        # Ошибки манифеста и его документов - ошибки входных данных, а не записи
+        try:
+            read_manifest(input_file)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"❌ Ошибка в манифесте {input_file}: {e}", file=sys.stderr)
+            sys.exit(EXIT_INPUT_ERROR)
     
     try:
-        output_file, slide_count = convert_markdown_to_pptx(input_file, output_file)
-        print(f"✅ Презентация создана: {output_file}")
-        print(f"📊 Всего слайдов: {slide_count}")
-        print(f"🎨 Использована цветовая схема: темно-синий (#003366)")
+        rules = load_section_rules(args.rules) if args.rules else None
+    except (OSError, ValueError) as e:
+        print(f"❌ Ошибка в правилах разделов: {e}", file=sys.stderr)
+        sys.exit(EXIT_USAGE)
+    
+    limits = None
+    limit_values = (args.max_input_bytes, args.max_line_length, args.max_sections,
+                    args.max_table_cells, args.max_slides, args.time_budget)
+    if any(value is not None for value in limit_values):
+        if sharded:
+            print("❌ Ошибка: лимиты ресурсов не поддерживаются при разбиении на части", file=sys.stderr)
+            sys.exit(EXIT_USAGE)
+        limits = ResourceLimits(*limit_values, on_limit=args.on_limit)
+    
+    if args.font:
+        try:
+            configure_text_fitter(args.font)
+        except (OSError, ImportError) as e:
+            print(f"❌ Ошибка загрузки шрифта: {e}", file=sys.stderr)
+            sys.exit(EXIT_USAGE)
+    
+    try:
+        if sharded:
+            index_file, shards = convert_markdown_to_sharded_pptx(
+                input_file, output_file,
+                max_slides=args.shard_slides,
+                max_sections=args.shard_sections,
+                max_bytes=args.shard_bytes,
+                workers=args.workers,
+                rules=rules,
+            )
+            print(f"✅ Презентация разбита на {len(shards)} файлов, индекс: {index_file}", file=log)
+            print(f"📊 Всего слайдов: {sum(shard['slides'] for shard in shards)}", file=log)
+        elif args.memprofile:
+            import json
+            output_file, slide_count, report = profile_conversion(input_file, output_file, rules=rules,
+                                                                  top=args.memprofile_top, limits=limits)
+            with open(args.memprofile, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            target = "stdout" if output_file == STDIO_PATH else output_file
+            print(f"✅ Презентация создана: {target}", file=log)
+            print(f"📊 Всего слайдов: {slide_count}", file=log)
+            for stage in report["stages"]:
+                print(f"🧠 {stage['stage']}: пик {_format_bytes(stage['peak_bytes'])}, "
+                      f"осталось {_format_bytes(stage['retained_bytes'])}, {stage['seconds']:.2f} с", file=log)
+            print(f"🧠 Отчет о памяти: {args.memprofile}", file=log)
+        elif args.update and output_file != STDIO_PATH and os.path.exists(output_file):
+            output_file, slide_count, changed = update_pptx(input_file, output_file, rules=rules,
+                                                            workers=args.workers, limits=limits)
+            print(f"✅ Презентация обновлена: {output_file}", file=log)
+            print(f"✏️ Перезаписано слайдов: {changed}", file=log)
+            print(f"📊 Всего слайдов: {slide_count}", file=log)
+        else:
+            output_file, slide_count = convert_markdown_to_pptx(input_file, output_file, rules=rules,
+                                                                workers=args.workers, limits=limits)
+            target = "stdout" if output_file == STDIO_PATH else output_file
+            print(f"✅ Презентация создана: {target}", file=log)
+            print(f"📊 Всего слайдов: {slide_count}", file=log)
+        if limits is not None and limits.warnings:
+            print(f"⚠️ Презентация сокращена, сработали лимиты: "
+                  f"{', '.join(sorted({w['limit'] for w in limits.warnings}))}", file=log)
+        print(f"🎨 Использована цветовая схема: темно-синий (#003366)", file=log)
+    except LimitExceeded as e:
+        import json
+        print(f"❌ Ошибка: {e}", file=sys.stderr)
+        print(json.dumps(e.to_dict(), ensure_ascii=False), file=sys.stderr)
+        sys.exit(EXIT_LIMIT_EXCEEDED)
+    except UnicodeDecodeError as e:
+        print(f"❌ Ошибка чтения входных данных (ожидается UTF-8): {e}", file=sys.stderr)
+        sys.exit(EXIT_INPUT_ERROR)
+    except OSError as e:
+        print(f"❌ Ошибка ввода-вывода: {e}", file=sys.stderr)
+        sys.exit(EXIT_INPUT_ERROR if getattr(e, 'filename', None) == input_file else EXIT_OUTPUT_ERROR)
     except Exception as e:
-        print(f"❌ Ошибка при создании презентации: {e}")
-        sys.exit(1)
+        print(f"❌ Ошибка при создании презентации: {e}", file=sys.stderr)
+        sys.exit(EXIT_CONVERSION_ERROR)
 
 if __name__ == "__main__":
     main()
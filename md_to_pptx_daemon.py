@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Фоновый процесс конвертера и тонкий клиент к нему через Unix сокет
+
+Демон один раз импортирует python-pptx и загружает шаблон, а затем выполняет
+команды CLI, присланные клиентом. Каждая задача обрабатывается в дочернем
+процессе (fork), который наследует уже прогретое состояние. Модуль при импорте
+использует только стандартную библиотеку, чтобы клиент запускался быстро.
+"""
+import base64
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+
+# Переменные окружения: путь к сокету и отключение клиента
+SOCKET_ENV = 'MD2PPTX_SOCKET'
+NO_DAEMON_ENV = 'MD2PPTX_NO_DAEMON'
+
+# Таймаут подключения клиента: если демон не отвечает, работаем без него
+CONNECT_TIMEOUT = 0.5
+
+# Опции CLI со значением (как в md_to_pptx.build_arg_parser): клиент разбирает
+# аргументы сам, чтобы не импортировать конвертер
+VALUE_OPTIONS = {
+    '--rules', '--font', '--shard-slides', '--shard-sections', '--shard-bytes',
+    '--workers', '--max-input-bytes', '--max-line-length', '--max-sections',
+    '--max-table-cells', '--max-slides', '--time-budget', '--on-limit',
+    '--memprofile', '--memprofile-top', '--socket',
+}
+
+def _scan_argv(argv):
+    """Разбирает аргументы CLI на позиционные и значения опций"""
+    positional, options = [], {}
+    args = iter(argv)
+    for arg in args:
+        if arg == '--':
+            positional.extend(args)
+            break
+        if arg.startswith('--'):
+            name, eq, value = arg.partition('=')
+            if name in VALUE_OPTIONS:
+                options[name] = value if eq else next(args, None)
+            else:
+                options[name] = True
+        else:
+            # "-" - путь к stdin/stdout, а не опция
+            positional.append(arg)
+    return positional, options
+
+def daemon_supported():
+    """Проверяет, доступны ли Unix сокеты и fork на этой платформе"""
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'fork')
+
+def default_socket_path():
+    """Путь к сокету демона: из окружения, в XDG_RUNTIME_DIR или в личном каталоге.
+
+    Без XDG_RUNTIME_DIR сокет лежит в каталоге md2pptx-<uid> во временном
+    каталоге, доступном только владельцу (см. _ensure_private_dir).
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and _is_private_dir(runtime_dir):
+        return os.path.join(runtime_dir, 'md2pptx.sock')
+    return os.path.join(tempfile.gettempdir(), f"md2pptx-{os.getuid()}", 'daemon.sock')
+
+def _is_private_dir(path):
+    """Проверяет, что каталог принадлежит пользователю и закрыт для остальных"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+def _ensure_private_dir(path):
+    """Создает каталог сокета с правами 0700 или проверяет существующий"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if not _is_private_dir(path):
+        raise RuntimeError(f"Каталог сокета {path} принадлежит другому пользователю или доступен другим")
+
+def _is_trusted_socket(path):
+    """Проверяет, что по пути лежит сокет, созданный текущим пользователем"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+def _peer_is_trusted(sock):
+    """Проверяет через SO_PEERCRED, что демон запущен тем же пользователем.
+
+    Там, где SO_PEERCRED нет, полагаемся на проверку владельца сокета.
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return True
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid == os.getuid()
+
+def _send_message(sock, message):
+    """Отправляет JSON сообщение, завершенное переводом строки"""
+    sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+
+def _read_message(stream):
+    """Читает одно JSON сообщение из файлового объекта сокета"""
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+def request_conversion(argv, socket_path=None, cwd=None, stdin=None):
+    """Отправляет аргументы CLI демону и возвращает его ответ.
+
+    stdin - байты стандартного ввода для команд с путем "-". Возвращает None,
+    если демон не запущен или сокет принадлежит другому пользователю, чтобы
+    вызывающий код мог выполнить конвертацию сам.
+    """
+    if not daemon_supported():
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not _is_trusted_socket(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+        if not _peer_is_trusted(sock):
+            # Чужому процессу не отправляем ни аргументы, ни документ
+            return None
+        sock.settimeout(None)
+        message = {"argv": list(argv), "cwd": cwd or os.getcwd()}
+        if stdin is not None:
+            message["stdin"] = base64.b64encode(stdin).decode('ascii')
+        _send_message(sock, message)
+        with sock.makefile('rb') as stream:
+            return _read_message(stream)
+    finally:
+        sock.close()
+
+def try_daemon_cli(argv):
+    """Выполняет команду CLI через демон, если он запущен.
+
+    При успешном ответе печатает вывод демона и завершает процесс с его
+    кодом возврата. Иначе возвращает управление для обычной конвертации.
+    """
+    positional, options = _scan_argv(argv)
+    if os.environ.get(NO_DAEMON_ENV) or '--daemon' in options or '--no-daemon' in options:
+        return
+    socket_path = options.get('--socket')
+    if not daemon_supported() or not _is_trusted_socket(socket_path or default_socket_path()):
+        return
+    # stdin читаем только при подключенном демоне и только если он - вход:
+    # "-" на месте выходного файла означает stdout
+    stdin = sys.stdin.buffer.read() if positional[:1] == ['-'] else None
+    try:
+        response = request_conversion(argv, socket_path, stdin=stdin)
+    except (OSError, ValueError):
+        response = None
+    if response is None:
+        if stdin is not None:
+            # Демон не ответил, а stdin уже прочитан - передаем его дальше
+            import io
+            sys.stdin = io.TextIOWrapper(io.BytesIO(stdin), encoding='utf-8')
+        return
+    sys.stdout.buffer.write(base64.b64decode(response.get("stdout", "")))
+    sys.stdout.flush()
+    sys.stderr.write(response.get("stderr", ""))
+    sys.exit(response.get("exit_code", 1))
+
+class _ConversionHandler(socketserver.StreamRequestHandler):
+    """Выполняет одну команду CLI в дочернем процессе демона"""
+
+    def handle(self):
+        import contextlib
+        import io
+        from md_to_pptx import main as cli_main
+
+        request = _read_message(self.rfile)
+        if request is None:
+            return
+        stdout_bytes = io.BytesIO()
+        stdout = io.TextIOWrapper(stdout_bytes, encoding='utf-8', write_through=True)
+        stderr = io.StringIO()
+        stdin = base64.b64decode(request.get("stdin", ""))
+        exit_code = 0
+        try:
+            # Дочерний процесс обслуживает одну задачу, поэтому смена
+            # каталога и стандартных потоков не затрагивает другие задачи
+            os.chdir(request.get("cwd") or '/')
+            sys.stdin = io.TextIOWrapper(io.BytesIO(stdin), encoding='utf-8')
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                cli_main(request.get("argv", []) + ['--no-daemon'])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            stderr.write(f"❌ Ошибка демона: {e}\n")
+            exit_code = 1
+        response = {
+            "exit_code": exit_code,
+            "stdout": base64.b64encode(stdout_bytes.getvalue()).decode('ascii'),
+            "stderr": stderr.getvalue(),
+        }
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+class _ConversionServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Unix сокет сервер, обрабатывающий каждое подключение в fork"""
+
+def _remove_stale_socket(socket_path):
+    """Удаляет файл сокета, если его не слушает другой демон"""
+    if not os.path.lexists(socket_path):
+        return
+    if not _is_trusted_socket(socket_path):
+        raise RuntimeError(f"Путь сокета занят файлом другого пользователя: {socket_path}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"Демон уже запущен: {socket_path}")
+    finally:
+        probe.close()
+
+def serve(socket_path=None):
+    """Запускает демон конвертации и обслуживает клиентов до остановки"""
+    if not daemon_supported():
+        raise RuntimeError("Демон требует поддержки Unix сокетов и fork")
+    import md_to_pptx
+
+    if not socket_path:
+        socket_path = default_socket_path()
+        if not os.environ.get(SOCKET_ENV):
+            _ensure_private_dir(os.path.dirname(socket_path))
+    # Прогреваем импорты и шаблон до приема задач
+    md_to_pptx.warm_up()
+    _remove_stale_socket(socket_path)
+    server = _ConversionServer(socket_path, _ConversionHandler)
+    os.chmod(socket_path, 0o600)
+    print(f"🚀 Демон конвертации слушает {socket_path}")
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
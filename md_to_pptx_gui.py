@@ -6,8 +6,32 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from md_to_pptx import convert_markdown_to_pptx
 
+# Статусы задач в очереди конвертации
+STATUS_QUEUED = "В очереди"
+STATUS_RUNNING = "Выполняется"
+STATUS_DONE = "Готово"
+STATUS_FAILED = "Ошибка"
+
+# Расширения Markdown файлов, которые добавляются при выборе папки
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+
+# Интервал опроса фоновых задач, мс
+POLL_INTERVAL_MS = 100
+
+def convert_job(input_path, output_path):
+    """Конвертирует один файл в фоновом процессе и замеряет время"""
+    started = time.perf_counter()
+    # Для файлов из подпапок результат кладется в такую же подпапку
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    output_file, slide_count = convert_markdown_to_pptx(input_path, output_path)
+    return output_file, slide_count, time.perf_counter() - started
+
 # Промпт для языковой модели
 PROMPT_TEMPLATE = """## Системный промпт для создания презентаций из Markdown
 
@@ -54,16 +78,17 @@ PROMPT_TEMPLATE = """## Системный промпт для создания
 4. Текст:
    - Обычный текст длиннее 15 символов будет включен
    - Можно использовать `**жирный текст**` для выделения
-   - Избегай блоков кода (```) — они будут удалены
+   - Блоки кода (```язык) выводятся на отдельных слайдах с подсветкой синтаксиса
 
 #### Ограничения и рекомендации
 
-- На слайд помещается до 7 пунктов (для введения — до 10)
-- Если пунктов больше, они разбиваются на несколько слайдов
+- Число пунктов на слайде зависит от длины текста: помещается около 9 коротких однострочных пунктов
+- Если пункты не помещаются, они переносятся на следующий слайд
 - Таблицы автоматически ограничиваются 8 строками и 5 столбцами
 - Эмодзи в тексте поддерживаются
 - Избегай горизонтальных разделителей `---` — они игнорируются
-- Не используй код-блоки — они удаляются при обработке
+- Длинные блоки кода переносятся на следующие слайды (около 16 строк по 80 символов на слайд)
+- Внутри блоков кода не начинай строки с `##`: такая строка начнет новый раздел (сдвинь ее хотя бы на один пробел)
 
 ### Пример структуры
 
@@ -149,8 +174,8 @@ class MarkdownToPPTXApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Конвертер Markdown → PowerPoint")
-        self.root.geometry("720x680")
-        self.root.resizable(False, False)
+        self.root.geometry("760x900")
+        self.root.minsize(720, 760)
         
         # Современная цветовая схема
         self.colors = {
@@ -172,10 +197,20 @@ class MarkdownToPPTXApp:
         # Переменные
         self.input_file = tk.StringVar()
         self.output_file = tk.StringVar()
+        self.worker_count = tk.IntVar(value=min(4, os.cpu_count() or 1))
+        
+        # Очередь конвертации: задачи по идентификатору строки таблицы
+        self.jobs = {}
+        self.executor = None
+        self.futures = {}
+        self.started_at = time.perf_counter()
         
         # Создаем интерфейс
         self.create_widgets()
         
+        # При закрытии окна останавливаем пул процессов
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Центрируем окно
         self.center_window()
     
@@ -278,9 +313,27 @@ class MarkdownToPPTXApp:
         )
         self.input_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10), ipady=10)
         
+        folder_button = tk.Button(
+            input_file_frame,
+            text="Папка",
+            command=self.browse_input_folder,
+            font=get_font('default', 12, 'bold'),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            relief=tk.FLAT,
+            bd=0,
+            padx=20,
+            pady=10,
+            cursor="hand2",
+            takefocus=False,
+            activebackground='#d0d3d6',
+            activeforeground=self.colors['text_primary']
+        )
+        folder_button.pack(side=tk.RIGHT, padx=(10, 0))
+        
         input_button = tk.Button(
             input_file_frame,
-            text="Выбрать файл",
+            text="Выбрать файлы",
             command=self.browse_input_file,
             font=get_font('default', 12, 'bold'),
             bg=self.colors['bg_accent'],
@@ -350,11 +403,14 @@ class MarkdownToPPTXApp:
         )
         output_button.pack(side=tk.RIGHT)
         
+        # Очередь конвертации
+        self.create_queue_widgets(main_container)
+        
         # Кнопка конвертации
         button_frame = tk.Frame(main_container, bg=self.colors['bg_primary'])
         button_frame.pack(fill=tk.X, pady=(10, 15))
         
-        convert_button = tk.Button(
+        self.convert_button = tk.Button(
             button_frame,
             text="🚀 Конвертировать",
             command=self.convert,
@@ -370,7 +426,7 @@ class MarkdownToPPTXApp:
             activebackground=self.colors['primary_hover'],
             activeforeground=self.colors['text_primary']
         )
-        convert_button.pack()
+        self.convert_button.pack()
         
         # Статус бар
         status_frame = tk.Frame(main_container, bg=self.colors['bg_primary'])
@@ -386,22 +442,217 @@ class MarkdownToPPTXApp:
         )
         self.status_label.pack()
     
+    def create_queue_widgets(self, parent):
+        """Создает таблицу очереди конвертации и панель управления ею"""
+        queue_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], padx=20, pady=12)
+        queue_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        toolbar = tk.Frame(queue_frame, bg=self.colors['bg_secondary'])
+        toolbar.pack(fill=tk.X, pady=(0, 8))
+        
+        tk.Label(
+            toolbar,
+            text="📋 Очередь",
+            font=get_font('default', 14, 'bold'),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['text_primary']
+        ).pack(side=tk.LEFT)
+        
+        for text, command in (("Очистить", self.clear_queue), ("Повторить ошибки", self.retry_failed)):
+            tk.Button(
+                toolbar,
+                text=text,
+                command=command,
+                font=get_font('default', 11),
+                bg=self.colors['bg_accent'],
+                fg=self.colors['text_primary'],
+                relief=tk.FLAT,
+                bd=0,
+                padx=12,
+                pady=4,
+                cursor="hand2",
+                takefocus=False,
+                activebackground='#d0d3d6',
+                activeforeground=self.colors['text_primary']
+            ).pack(side=tk.RIGHT, padx=(8, 0))
+        
+        tk.Spinbox(
+            toolbar,
+            from_=1,
+            to=max(1, os.cpu_count() or 1),
+            textvariable=self.worker_count,
+            width=3,
+            font=get_font('default', 11)
+        ).pack(side=tk.RIGHT, padx=(4, 8))
+        tk.Label(
+            toolbar,
+            text="Процессов:",
+            font=get_font('default', 11),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['text_secondary']
+        ).pack(side=tk.RIGHT)
+        
+        table_frame = tk.Frame(queue_frame, bg=self.colors['bg_secondary'])
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ("file", "status", "slides", "elapsed")
+        self.queue_table = ttk.Treeview(table_frame, columns=columns, show="headings", height=6)
+        for column, heading, width, anchor in (
+            ("file", "Файл", 330, tk.W),
+            ("status", "Статус", 110, tk.W),
+            ("slides", "Слайдов", 70, tk.CENTER),
+            ("elapsed", "Время", 70, tk.CENTER),
+        ):
+            self.queue_table.heading(column, text=heading)
+            self.queue_table.column(column, width=width, anchor=anchor, stretch=(column == "file"))
+        self.queue_table.tag_configure("failed", foreground="#dc3545")
+        self.queue_table.tag_configure("done", foreground=self.colors['success'])
+        # Двойной клик по строке с ошибкой показывает ее и ставит задачу повторно
+        self.queue_table.bind("<Double-1>", self.on_queue_double_click)
+        
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.queue_table.yview)
+        self.queue_table.configure(yscrollcommand=scrollbar.set)
+        self.queue_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    
     def browse_input_file(self):
-        """Открывает диалог выбора входного файла"""
-        filename = filedialog.askopenfilename(
-            title="Выберите Markdown файл",
+        """Открывает диалог выбора одного или нескольких входных файлов"""
+        filenames = filedialog.askopenfilenames(
+            title="Выберите Markdown файлы",
             filetypes=[("Markdown files", "*.md"), ("All files", "*.*")]
         )
-        if filename:
+        if filenames:
+            self.add_to_queue(filenames)
+    
+    def browse_input_folder(self):
+        """Добавляет в очередь все Markdown файлы из выбранной папки"""
+        directory = filedialog.askdirectory(title="Выберите папку с Markdown файлами")
+        if not directory:
+            return
+        filenames = []
+        for current_dir, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.lower().endswith(MARKDOWN_EXTENSIONS):
+                    filenames.append(os.path.join(current_dir, name))
+        if not filenames:
+            messagebox.showinfo("Папка", f"В папке нет Markdown файлов:\n{directory}")
+            return
+        self.add_to_queue(sorted(filenames), root=directory)
+    
+    def add_to_queue(self, filenames, root=None):
+        """Добавляет файлы в очередь, пропуская уже добавленные.
+
+        root - выбранная папка: результаты файлов из ее подпапок сохраняются
+        в такие же подпапки папки результатов.
+        """
+        queued = {job["input"] for job in self.jobs.values()}
+        for filename in filenames:
+            if filename in queued:
+                continue
+            iid = self.queue_table.insert("", tk.END, values=(os.path.basename(filename), STATUS_QUEUED, "", ""))
+            self.jobs[iid] = {"input": filename, "root": root, "status": STATUS_QUEUED, "error": None}
+        
+        if len(self.jobs) == 1:
+            filename = next(iter(self.jobs.values()))["input"]
             self.input_file.set(filename)
             # Автоматически генерируем имя выходного файла
-            base_name = os.path.splitext(os.path.basename(filename))[0]
-            directory = os.path.dirname(filename)
-            output_path = os.path.join(directory, f"{base_name}.pptx")
-            self.output_file.set(output_path)
+            self.output_file.set(self.default_output_path(filename))
+        else:
+            self.input_file.set(self.queue_summary())
+            self.output_file.set("")
+    
+    def queue_summary(self):
+        """Текст поля входного файла, когда в очереди несколько файлов"""
+        return f"Выбрано файлов: {len(self.jobs)}"
+    
+    @staticmethod
+    def default_output_path(filename):
+        """Путь к .pptx рядом с исходным файлом"""
+        base_name = os.path.splitext(os.path.basename(filename))[0]
+        directory = os.path.dirname(filename)
+        return os.path.join(directory, f"{base_name}.pptx")
+    
+    def output_path_for(self, job):
+        """Выходной путь задачи: указанный пользователем или рядом с исходным.
+
+        Поле выходного файла - это путь к файлу, если в очереди один файл,
+        и папка для результатов, если файлов несколько.
+        """
+        output = self.output_file.get()
+        if not output:
+            return self.default_output_path(job["input"])
+        if len(self.jobs) == 1:
+            return output
+        if job.get("root"):
+            relative = os.path.relpath(job["input"], job["root"])
+        else:
+            relative = os.path.basename(job["input"])
+        return os.path.join(output, f"{os.path.splitext(relative)[0]}.pptx")
+    
+    def assign_outputs(self, pending):
+        """Назначает задачам выходные пути так, чтобы они не совпадали.
+
+        Одноименные файлы из разных папок иначе записывались бы в один
+        результат; к повторяющемуся имени добавляется номер.
+        """
+        taken = {self.jobs[iid]["output"] for iid in self.futures if iid in self.jobs}
+        for iid in pending:
+            job = self.jobs[iid]
+            output = self.output_path_for(job)
+            base, ext = os.path.splitext(output)
+            number = 2
+            while output in taken:
+                output = f"{base}_{number}{ext}"
+                number += 1
+            taken.add(output)
+            job["output"] = output
+    
+    def clear_queue(self):
+        """Удаляет из очереди все задачи, кроме выполняющихся"""
+        for iid, job in list(self.jobs.items()):
+            if job["status"] != STATUS_RUNNING and iid not in self.futures:
+                self.queue_table.delete(iid)
+                del self.jobs[iid]
+        if not self.jobs:
+            self.input_file.set("")
+            self.output_file.set("")
+    
+    def retry_failed(self):
+        """Ставит задачи с ошибками в очередь повторно"""
+        failed = [iid for iid, job in self.jobs.items() if job["status"] == STATUS_FAILED]
+        for iid in failed:
+            self.set_job_status(iid, STATUS_QUEUED)
+        if failed:
+            self.convert()
+    
+    def on_queue_double_click(self, event):
+        """Показывает ошибку задачи и предлагает повторить ее"""
+        iid = self.queue_table.identify_row(event.y)
+        job = self.jobs.get(iid)
+        if not job or job["status"] != STATUS_FAILED:
+            return
+        if messagebox.askyesno("❌ Ошибка", f"{job['input']}\n\n{job['error']}\n\nПовторить конвертацию?"):
+            self.set_job_status(iid, STATUS_QUEUED)
+            self.convert()
+    
+    def set_job_status(self, iid, status, slides="", elapsed=""):
+        """Обновляет статус задачи и ее строку в таблице"""
+        job = self.jobs[iid]
+        job["status"] = status
+        tags = {STATUS_FAILED: ("failed",), STATUS_DONE: ("done",)}.get(status, ())
+        self.queue_table.item(
+            iid,
+            values=(os.path.basename(job["input"]), status, slides, elapsed),
+            tags=tags
+        )
     
     def browse_output_file(self):
-        """Открывает диалог выбора выходного файла"""
+        """Открывает диалог выбора выходного файла (или папки для нескольких файлов)"""
+        if len(self.jobs) > 1:
+            directory = filedialog.askdirectory(title="Папка для PowerPoint файлов")
+            if directory:
+                self.output_file.set(directory)
+            return
         filename = filedialog.asksaveasfilename(
             title="Сохранить PowerPoint файл",
             defaultextension=".pptx",
@@ -448,35 +699,125 @@ class MarkdownToPPTXApp:
         self.root.after_idle(reset_focus)
     
     def convert(self):
-        """Выполняет конвертацию"""
-        input_path = self.input_file.get()
-        output_path = self.output_file.get()
+        """Запускает конвертацию всех задач очереди в фоновом пуле процессов"""
+        # Путь, введенный или выбранный в поле входного файла, тоже ставим
+        # в очередь, если его там еще нет
+        typed = self.input_file.get().strip()
+        if typed and typed != self.queue_summary() and typed not in {job["input"] for job in self.jobs.values()}:
+            self.add_to_queue([typed])
         
         # Валидация
-        if not input_path:
+        if not self.jobs:
             messagebox.showerror("Ошибка", "Пожалуйста, выберите входной файл")
             return
         
-        if not os.path.exists(input_path):
-            messagebox.showerror("Ошибка", f"Файл не найден: {input_path}")
+        pending = [iid for iid, job in self.jobs.items()
+                   if job["status"] == STATUS_QUEUED and iid not in self.futures]
+        if not pending and not self.futures:
+            # Очередь уже обработана: повторная конвертация (например, после
+            # правки Markdown) заново ставит в очередь все задачи
+            for iid in self.jobs:
+                self.set_job_status(iid, STATUS_QUEUED)
+            pending = list(self.jobs)
+        if not pending:
             return
         
-        if not output_path:
-            messagebox.showerror("Ошибка", "Пожалуйста, укажите выходной файл")
+        for iid in pending:
+            job = self.jobs[iid]
+            if not os.path.exists(job["input"]):
+                job["error"] = f"Файл не найден: {job['input']}"
+                self.set_job_status(iid, STATUS_FAILED)
+        pending = [iid for iid in pending if self.jobs[iid]["status"] == STATUS_QUEUED]
+        
+        if not pending:
+            self.show_summary()
             return
         
+        start_polling = self.executor is None
+        if start_polling:
+            try:
+                workers = max(1, int(self.worker_count.get()))
+            except (tk.TclError, ValueError):
+                workers = 1
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            self.started_at = time.perf_counter()
+        
+        self.assign_outputs(pending)
+        for iid in pending:
+            job = self.jobs[iid]
+            self.futures[iid] = self.executor.submit(convert_job, job["input"], job["output"])
+        
         # Обновляем статус
         self.status_label.config(
             text="⏳ Конвертация в процессе...",
             fg=self.colors['primary'],
             font=get_font('default', 12, 'bold')
         )
-        self.root.update()
+        if start_polling:
+            self.root.after(POLL_INTERVAL_MS, self.poll_jobs)
+    
+    def poll_jobs(self):
+        """Переносит состояние фоновых задач в таблицу (в потоке интерфейса)"""
+        for iid, future in list(self.futures.items()):
+            job = self.jobs.get(iid)
+            if not future.done():
+                if job and future.running() and job["status"] != STATUS_RUNNING:
+                    self.set_job_status(iid, STATUS_RUNNING)
+                continue
+            del self.futures[iid]
+            if job is None:
+                continue
+            try:
+                output_file, slide_count, elapsed = future.result()
+            except Exception as e:
+                job["error"] = str(e)
+                self.set_job_status(iid, STATUS_FAILED)
+            else:
+                job["output"] = output_file
+                job["slides"] = slide_count
+                job["error"] = None
+                self.set_job_status(iid, STATUS_DONE, slide_count, f"{elapsed:.1f} с")
+        
+        done = sum(1 for job in self.jobs.values() if job["status"] == STATUS_DONE)
+        if self.futures:
+            self.status_label.config(text=f"⏳ Готово {done} из {len(self.jobs)}...")
+            self.root.after(POLL_INTERVAL_MS, self.poll_jobs)
+            return
         
-        try:
-            # Выполняем конвертацию
-            output_file, slide_count = convert_markdown_to_pptx(input_path, output_path)
-            
+        self.executor.shutdown(wait=False)
+        self.executor = None
+        self.show_summary()
+    
+    def on_close(self):
+        """Закрывает окно, отменяя ожидающие задачи и останавливая пул процессов"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.root.destroy()
+    
+    def show_summary(self):
+        """Показывает итог обработки очереди"""
+        failed = [job for job in self.jobs.values() if job["status"] == STATUS_FAILED]
+        done = [job for job in self.jobs.values() if job["status"] == STATUS_DONE]
+        elapsed = time.perf_counter() - self.started_at
+        
+        if failed:
+            messagebox.showerror(
+                "❌ Ошибка",
+                f"Не удалось сконвертировать файлов: {len(failed)} из {len(self.jobs)}\n\n"
+                + "\n".join(f"{os.path.basename(job['input'])}: {job['error']}" for job in failed[:5])
+                + "\n\nДважды кликните по строке или нажмите «Повторить ошибки»."
+            )
+            self.status_label.config(
+                text=f"❌ Ошибок: {len(failed)}, готово: {len(done)}",
+                fg="#dc3545",
+                font=get_font('default', 12, 'bold')
+            )
+            return
+        
+        slide_count = sum(job["slides"] for job in done)
+        if len(done) == 1:
+            output_file = done[0]["output"]
             # Показываем успешное сообщение
             messagebox.showinfo(
                 "✅ Успех",
@@ -485,24 +826,19 @@ class MarkdownToPPTXApp:
                 f"📊 Всего слайдов: {slide_count}\n\n"
                 f"📁 Путь: {output_file}"
             )
-            
-            self.status_label.config(
-                text=f"✅ Готово! Создано {slide_count} слайдов",
-                fg=self.colors['success'],
-                font=get_font('default', 12, 'bold')
-            )
-            
-        except Exception as e:
-            error_msg = str(e)
-            messagebox.showerror(
-                "❌ Ошибка",
-                f"Ошибка при конвертации:\n\n{error_msg}"
-            )
-            self.status_label.config(
-                text="❌ Ошибка при конвертации",
-                fg="#dc3545",
-                font=get_font('default', 12, 'bold')
+        else:
+            messagebox.showinfo(
+                "✅ Успех",
+                f"Создано презентаций: {len(done)}\n"
+                f"📊 Всего слайдов: {slide_count}\n"
+                f"⏱ Время: {elapsed:.1f} с"
             )
+        
+        self.status_label.config(
+            text=f"✅ Готово! Создано {slide_count} слайдов",
+            fg=self.colors['success'],
+            font=get_font('default', 12, 'bold')
+        )
 
 def main():
     """Запускает GUI приложение"""
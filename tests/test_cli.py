@@ -0,0 +1,57 @@
+import json
+import sys
+
+import pytest
+
+import md_to_pptx
+from md_to_pptx import EXIT_INPUT_ERROR, main
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["md_to_pptx.py", *argv, "--no-daemon"])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    return exc.value.code
+
+
+def test_missing_manifest_document_is_input_error(tmp_path, monkeypatch):
+    (tmp_path / "u.md").write_text("# Доклад\n\n## Раздел\n- пункт\n", encoding="utf-8")
+    manifest = tmp_path / "m.json"
+    manifest.write_text(json.dumps({"documents": ["u.md", "missing.md"]}), encoding="utf-8")
+    with pytest.raises(FileNotFoundError) as exc:
+        md_to_pptx.read_manifest(str(manifest))
+    assert exc.value.filename.endswith("missing.md")
+    assert run_main(monkeypatch, str(manifest), str(tmp_path / "o.pptx")) == EXIT_INPUT_ERROR
+    assert not (tmp_path / "o.pptx").exists()
+
+
+DOCUMENT = "# Доклад\n\n" + "".join(f"## Раздел {i}\n- пункт {i}\n\n" for i in range(6))
+
+
+@pytest.mark.parametrize("max_slides", [1, 2, 3])
+def test_truncated_deck_fits_max_slides(tmp_path, max_slides):
+    source = tmp_path / "in.md"
+    source.write_text(DOCUMENT, encoding="utf-8")
+    limits = md_to_pptx.ResourceLimits(max_slides=max_slides, max_sections=4, on_limit="truncate")
+    _, slide_count = md_to_pptx.convert_markdown_to_pptx(str(source), str(tmp_path / "o.pptx"), limits=limits)
+    assert slide_count == max_slides
+    assert {w["limit"] for w in limits.warnings} == {"max_sections", "max_slides"}
+
+
+def test_memprofile_applies_limits(tmp_path, monkeypatch):
+    source = tmp_path / "in.md"
+    source.write_text(DOCUMENT, encoding="utf-8")
+    code = run_main(monkeypatch, str(source), str(tmp_path / "o.pptx"),
+                    "--memprofile", str(tmp_path / "mem.json"), "--max-slides", "2")
+    assert code == md_to_pptx.EXIT_LIMIT_EXCEEDED
+    limits = md_to_pptx.ResourceLimits(max_slides=2, on_limit="truncate")
+    _, slide_count, _ = md_to_pptx.profile_conversion(str(source), str(tmp_path / "o.pptx"), limits=limits)
+    assert slide_count == 2
+
+
+@pytest.mark.parametrize("option", ["--workers", "--memprofile-top", "--max-slides"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_non_positive_counts_are_usage_errors(tmp_path, monkeypatch, option, value):
+    source = tmp_path / "in.md"
+    source.write_text(DOCUMENT, encoding="utf-8")
+    assert run_main(monkeypatch, str(source), str(tmp_path / "o.pptx"), option, value) == md_to_pptx.EXIT_USAGE
@@ -0,0 +1,45 @@
+from md_to_pptx import (
+    _code_paragraphs_xml, create_code_slide, extract_bullets, new_presentation,
+    parse_markdown_sections, plan_section_slides,
+)
+
+
+def test_bullets_skip_fenced_code_with_blank_lines():
+    content = ["- пункт", "```python", "x = 1", "", "- не пункт", "```", "- второй пункт"]
+    assert extract_bullets(content) == ["пункт", "второй пункт"]
+
+
+def test_code_xml_accepts_control_characters():
+    prs = new_presentation()
+    slide = create_code_slide(prs, "Код", "a\x0cb\x00c￾", "")
+    text = slide.shapes[-1].text_frame.text
+    assert "_x000C_" in text and "￾" not in text
+    assert "_x0000_" in _code_paragraphs_xml([[("\x00", None)]])
+
+
+def test_intro_and_case_sections_keep_code_blocks():
+    md = "\n".join([
+        "# Доклад",
+        "## Введение",
+        "### Продукт",
+        "- пункт продукта",
+        "```sh",
+        "make intro",
+        "```",
+        "### Рынок",
+        "- пункт рынка",
+        "## Кейсы использования",
+        "### Кейс 1",
+        "- пункт кейса",
+        "```sh",
+        "make case",
+        "```",
+        "### Кейс 2",
+        "- пункт второго кейса",
+    ])
+    codes = {
+        section["title"]: [spec["code"] for spec in plan_section_slides(section) if spec["kind"] == "code"]
+        for section in parse_markdown_sections(md)
+    }
+    assert codes["Введение"] == ["make intro"]
+    assert codes["Кейсы использования"] == ["make case"]
@@ -0,0 +1,43 @@
+import builtins
+
+import md_to_pptx
+from md_to_pptx import CodeHighlighter
+
+
+def block_pygments(monkeypatch):
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "pygments" or name.startswith("pygments."):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+
+
+def test_plain_fallback_is_not_stored_on_disk(tmp_path, monkeypatch):
+    code = "def f(x):\n    return x"
+    block_pygments(monkeypatch)
+    plain = CodeHighlighter(str(tmp_path)).highlight(code, "python")
+    assert all(color is None for line in plain for _, color in line)
+    assert not list(tmp_path.iterdir())
+    monkeypatch.undo()
+
+    colored = CodeHighlighter(str(tmp_path)).highlight(code, "python")
+    assert any(color for line in colored for _, color in line)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert CodeHighlighter(str(tmp_path)).highlight(code, "python") == colored
+
+
+def test_unknown_language_is_not_stored_on_disk(tmp_path):
+    CodeHighlighter(str(tmp_path)).highlight("x", "no-such-language")
+    assert not list(tmp_path.iterdir())
+
+
+def test_disk_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setattr(md_to_pptx, "_CODE_HIGHLIGHTER", None)
+    monkeypatch.delenv("MD2PPTX_CODE_CACHE", raising=False)
+    assert md_to_pptx.get_code_highlighter().cache_dir is None
+    monkeypatch.setattr(md_to_pptx, "_CODE_HIGHLIGHTER", None)
+    monkeypatch.setenv("MD2PPTX_CODE_CACHE", str(tmp_path))
+    assert md_to_pptx.get_code_highlighter().cache_dir == str(tmp_path)
@@ -0,0 +1,21 @@
+from md_to_pptx import build_arg_parser
+from md_to_pptx_daemon import VALUE_OPTIONS, _scan_argv
+
+
+def test_value_options_match_cli_parser():
+    parser = build_arg_parser()
+    expected = {
+        option
+        for action in parser._actions
+        if action.option_strings and action.nargs != 0
+        for option in action.option_strings
+    }
+    assert VALUE_OPTIONS == expected
+
+
+def test_scan_argv_finds_input_positional():
+    assert _scan_argv(["in.md", "-"])[0] == ["in.md", "-"]
+    assert _scan_argv(["-", "out.pptx"])[0][:1] == ["-"]
+    assert _scan_argv(["--rules", "-", "in.md", "-"])[0] == ["in.md", "-"]
+    assert _scan_argv(["--socket=/s", "--update", "in.md"]) == (["in.md"], {"--socket": "/s", "--update": True})
+    assert _scan_argv(["--", "--odd.md"])[0] == ["--odd.md"]
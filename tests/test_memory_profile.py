@@ -0,0 +1,15 @@
+from md_to_pptx import MemoryProfile
+
+
+def test_top_allocations_skip_freed_memory():
+    profile = MemoryProfile(top=2).start()
+    try:
+        freed = [bytearray(1000) for _ in range(2000)]
+        with profile.stage("stage"):
+            del freed[:]
+            kept = [bytearray(300) for _ in range(1000)], [str(i) * 50 for i in range(1000)]
+    finally:
+        profile.stop()
+    top = profile.stages[0]["top_allocations"]
+    assert len(top) == 2 and all(entry["size_bytes"] > 0 for entry in top)
+    assert kept
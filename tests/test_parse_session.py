@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from md_to_pptx import MarkdownParseSession, optimize_sections, parse_markdown_sections
+
+# Строки, из которых собираются случайные документы: заголовки всех уровней,
+# списки, таблицы, разделители, ограждения кода и пустые строки
+LINES = [
+    '## 1. Раздел A', '## Введение', '## 2️⃣', '### Под', '###', '#### глубоко',
+    '- пункт', '  - вложенный', '', '---', 'текст строки длинный', '| a | b |',
+    '|---|---|', '```', '```python', '##Без пробела', ' ## не заголовок',
+]
+
+
+def random_lines(rng, count):
+    return [rng.choice(LINES) for _ in range(count)]
+
+
+def test_empty_document():
+    session = MarkdownParseSession("")
+    assert session.sections == parse_markdown_sections("")
+    session.apply_edit(0, 1, ["## A", "- x"])
+    assert session.sections == parse_markdown_sections("## A\n- x")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_full_parse(seed):
+    rng = random.Random(seed)
+    for trial in range(300):
+        text = '\n'.join(random_lines(rng, rng.randint(0, 30)))
+        session = MarkdownParseSession(text)
+        assert session.sections == parse_markdown_sections(text)
+        for _ in range(15):
+            count = len(session.lines)
+            start = rng.randint(0, count)
+            end = rng.randint(start, min(count, start + rng.randint(0, 6)))
+            if rng.random() < 0.8:
+                new_lines = random_lines(rng, rng.randint(0, 5))
+            else:
+                new_lines = '\n'.join(random_lines(rng, 2))
+            session.apply_edit(start, end, new_lines)
+            expected = parse_markdown_sections(session.text)
+            assert session.sections == expected, (seed, trial, session.text)
+            assert session.optimized_sections == optimize_sections(expected)
@@ -0,0 +1,59 @@
+import random
+import re
+
+import pytest
+
+from md_to_pptx import DEFAULT_SECTION_RULES, SectionRuleSet
+
+
+def reference_match(rules, text):
+    """Прямой перебор правил в порядке приоритета"""
+    for rule in rules:
+        folded = text.casefold()
+        for keyword in rule.get("keywords", []):
+            if rule.get("ignore_case") and keyword.casefold() in folded:
+                return rule["name"]
+            if not rule.get("ignore_case") and keyword in text:
+                return rule["name"]
+        if rule.get("pattern"):
+            flags = re.IGNORECASE if rule.get("ignore_case") else 0
+            if re.search(rule["pattern"], text, flags):
+                return rule["name"]
+    return None
+
+
+def test_default_rules():
+    ruleset = SectionRuleSet(DEFAULT_SECTION_RULES)
+    assert ruleset.match("Введение")["name"] == "intro"
+    assert ruleset.match("Кейсы использования")["name"] == "cases"
+    assert ruleset.match("Введение в КЕЙСЫ")["name"] == "intro"
+    assert ruleset.match("Архитектура") is None
+    assert ruleset.match("") is None
+
+
+def test_matches_reference_on_random_rules():
+    rng = random.Random(1234)
+    alphabet = "абвгдеКЕabcAB "
+    for _ in range(200):
+        rules = []
+        # До 60 правил: проверяются и прямой поиск, и автомат
+        for i in range(rng.randint(1, 60)):
+            rule = {
+                "name": f"r{i}",
+                "keywords": ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3)))
+                             for _ in range(rng.randint(0, 3))],
+                "ignore_case": rng.random() < 0.5,
+            }
+            if not rule["keywords"] or rng.random() < 0.2:
+                rule["pattern"] = rng.choice(["^а", "b+c", "[КЕ]{2}", "е$"])
+            rules.append(rule)
+        ruleset = SectionRuleSet(rules)
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            matched = ruleset.match(text)
+            assert (matched["name"] if matched else None) == reference_match(rules, text), (rules, text)
+
+
+def test_invalid_pattern_is_value_error():
+    with pytest.raises(ValueError, match="Некорректный шаблон"):
+        SectionRuleSet([{"name": "bad", "pattern": "(unclosed"}])
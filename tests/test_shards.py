@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from md_to_pptx import (
+    SHARD_BASE_BYTES, convert_markdown_to_sharded_pptx, estimate_slide_bytes, plan_shards, slide_spec,
+)
+
+
+def make_plan(*slide_counts):
+    return [
+        ({"title": f"Раздел {i}"}, [slide_spec("bullets", title=f"Раздел {i}", bullets=[f"пункт {j}"])
+                                    for j in range(count)])
+        for i, count in enumerate(slide_counts)
+    ]
+
+
+def shard_sections(shards):
+    return [shard["sections"] for shard in shards]
+
+
+def test_slides_limit_keeps_sections_whole():
+    shards = plan_shards(make_plan(2, 2, 1, 3), max_slides=4)
+    assert shard_sections(shards) == [["Раздел 0", "Раздел 1"], ["Раздел 2", "Раздел 3"]]
+    assert [len(shard["slides"]) for shard in shards] == [4, 4]
+
+
+def test_sections_limit():
+    shards = plan_shards(make_plan(1, 1, 1, 1, 1), max_sections=2)
+    assert shard_sections(shards) == [["Раздел 0", "Раздел 1"], ["Раздел 2", "Раздел 3"], ["Раздел 4"]]
+
+
+def test_bytes_limit():
+    plan = make_plan(1, 1, 1)
+    slide_bytes = estimate_slide_bytes(plan[0][1][0])
+    shards = plan_shards(plan, max_bytes=SHARD_BASE_BYTES + 2 * slide_bytes)
+    assert shard_sections(shards) == [["Раздел 0", "Раздел 1"], ["Раздел 2"]]
+    assert all(shard["bytes"] <= SHARD_BASE_BYTES + 2 * slide_bytes for shard in shards)
+
+
+def test_section_larger_than_limit_is_split_by_slides():
+    shards = plan_shards(make_plan(1, 5), max_slides=2)
+    assert [len(shard["slides"]) for shard in shards] == [1, 2, 2, 1]
+    assert shard_sections(shards) == [["Раздел 0"], ["Раздел 1"], ["Раздел 1"], ["Раздел 1"]]
+
+
+@pytest.mark.parametrize("limit", ["max_slides", "max_sections", "max_bytes"])
+@pytest.mark.parametrize("value", [0, -1])
+def test_non_positive_limits_are_rejected(limit, value):
+    with pytest.raises(ValueError):
+        plan_shards(make_plan(1), **{limit: value})
+
+
+def test_stale_parts_are_removed(tmp_path):
+    source = tmp_path / "in.md"
+    source.write_text("# Доклад\n\n" + "".join(f"## Раздел {i}\n- пункт {i}\n\n" for i in range(4)),
+                      encoding="utf-8")
+    output = tmp_path / "deck.pptx"
+    for name in ("deck_part05.pptx", "deck_part99.pptx", "deck_partial.pptx", "other_part01.pptx"):
+        (tmp_path / name).write_bytes(b"old")
+    index_file, shards = convert_markdown_to_sharded_pptx(str(source), str(output), max_slides=1, workers=1)
+    current = [shard["file"] for shard in shards]
+    assert current[:2] == ["deck_part01.pptx", "deck_part02.pptx"] and len(current) < 5
+    parts = sorted(path.name for path in tmp_path.glob("*_part*"))
+    assert parts == sorted(current + ["deck_partial.pptx", "other_part01.pptx"])
+    with open(index_file, encoding="utf-8") as f:
+        assert [shard["file"] for shard in json.load(f)["shards"]] == current
@@ -0,0 +1,26 @@
+import pytest
+from lxml import etree
+
+import md_to_pptx as m
+
+SPECS = [
+    m.slide_spec("title", title="Доклад", subtitle="Часть 1 из 2"),
+    m.slide_spec("title", title="Доклад"),
+    m.slide_spec("bullets", title="Список", bullets=["первый", "**второй**", "третий"]),
+    m.slide_spec("bullets", title="Список", bullets=[f"пункт {i}" for i in range(12)], max_bullets=5),
+    m.slide_spec("table", title="Таблица", table_data=[["a", "b", "c"], ["1", "**2**", ""], ["x\x0cy", "z"]]),
+    m.slide_spec("table", title="Таблица", table_data=[[f"{i}.{j}" for j in range(7)] for i in range(12)]),
+    m.slide_spec("code", title="Код", code="def f(x):\n    return x * 2", language="python"),
+    m.slide_spec("code", title="Код", code="plain <text> & more"),
+    m.slide_spec("content", title="Текст", content_text="строка\nвторая строка"),
+]
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec["kind"])
+def test_skeleton_matches_create_function(spec):
+    # Без заготовки render_slide вызвал бы ту же create_* и сравнение было бы пустым
+    assert hasattr(m.get_slide_skeletons(), f"{spec['kind']}_slide")
+    args = {key: value for key, value in spec.items() if key != "kind"}
+    slide = m.render_slide(m.new_presentation(), spec)
+    reference = m.SLIDE_BUILDERS[spec["kind"]](m.new_presentation(), **args)
+    assert etree.tostring(slide._element) == etree.tostring(reference._element)
@@ -0,0 +1,11 @@
+from md_to_pptx import convert_markdown_to_pptx
+from pptx import Presentation
+
+
+def test_table_cells_with_control_characters_convert(tmp_path):
+    source = tmp_path / "in.md"
+    source.write_text("# Доклад\n\n## Таблица\n| a | b |\n|---|---|\n| x\x0cy | z￾ |\n", encoding="utf-8")
+    output, _ = convert_markdown_to_pptx(str(source), str(tmp_path / "o.pptx"))
+    table = next(shape.table for slide in Presentation(output).slides for shape in slide.shapes if shape.has_table)
+    # Управляющий символ записан так же, как его записывает python-pptx
+    assert [cell.text for cell in table.rows[1].cells] == ["x_x000C_y", "z"]
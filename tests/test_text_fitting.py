@@ -0,0 +1,31 @@
+from lxml import etree
+
+import md_to_pptx as m
+
+
+def test_calibri_width_table_has_no_duplicates():
+    total = sum(len(chars) for chars, _ in m._CALIBRI_WIDTH_ROWS)
+    assert total == len(m.CALIBRI_WIDTHS)
+    # Кириллица, совпадающая с латиницей, имеет ту же ширину
+    for cyrillic, latin in zip("аеосАЕКМОТ", "aeocAEKMOT"):
+        assert m.CALIBRI_WIDTHS[cyrillic] == m.CALIBRI_WIDTHS[latin]
+
+
+def test_duplicate_width_is_rejected():
+    try:
+        m._width_table([("ab", (1, 2)), ("a", (3,))])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("повтор символа не обнаружен")
+
+
+def test_content_slide_styles_every_paragraph():
+    text = "первая строка\nвторая строка\nтретья"
+    prs = m.new_presentation()
+    slide = m.render_slide(prs, m.slide_spec("content", title="T", content_text=text))
+    paragraphs = slide.placeholders[1].text_frame.paragraphs
+    assert [p.font.size.pt for p in paragraphs] == [m.CONTENT_FONT_SIZE] * 3
+
+    reference = m.create_content_slide(m.new_presentation(), "T", text)
+    assert etree.tostring(slide._element) == etree.tostring(reference._element)
@@ -0,0 +1,158 @@
+import os
+import stat
+import zipfile
+
+from pptx import Presentation
+
+from md_to_pptx import _key_sources, convert_markdown_to_pptx, update_pptx
+
+def bullets(name, count=9):
+    # Девять строк не дают optimize_sections объединить раздел с соседним
+    return "".join(f"- пункт {name} {i}\n" for i in range(count))
+
+
+SECTIONS = {
+    "Alpha": bullets("альфы"),
+    "Beta": bullets("беты"),
+    "Gamma": "| a | b |\n|---|---|\n| 1 | 2 |\n",
+    "Delta": bullets("дельты"),
+}
+CHANGED_BETA = bullets("беты", 8) + "- измененный пункт беты\n"
+
+
+def write_md(path, sections):
+    path.write_text("# Доклад\n\n" + "".join(f"## {title}\n{body}\n" for title, body in sections.items()),
+                    encoding="utf-8")
+
+
+def slide_title(slide):
+    # На слайде таблицы заголовок - отдельная надпись, а место заголовка макета пустое
+    return next((shape.text_frame.text for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text), "")
+
+
+def slide_titles(path):
+    return [slide_title(slide) for slide in Presentation(str(path)).slides]
+
+
+def notes_by_title(path):
+    return {
+        slide_title(slide): slide.notes_slide.notes_text_frame.text
+        for slide in Presentation(str(path)).slides
+        if slide.has_notes_slide
+    }
+
+
+def add_notes(path, notes):
+    prs = Presentation(str(path))
+    for slide, text in zip(prs.slides, notes):
+        if text:
+            slide.notes_slide.notes_text_frame.text = text
+    prs.save(str(path))
+
+
+def read_parts(path):
+    with zipfile.ZipFile(path) as z:
+        return {name: z.read(name) for name in z.namelist()}
+
+
+def make_deck(tmp_path, sections=SECTIONS):
+    source, output = tmp_path / "in.md", tmp_path / "deck.pptx"
+    write_md(source, sections)
+    convert_markdown_to_pptx(str(source), str(output))
+    return source, output
+
+
+def test_only_changed_slide_is_rewritten(tmp_path):
+    source, output = make_deck(tmp_path)
+    before = read_parts(output)
+    write_md(source, dict(SECTIONS, Beta=CHANGED_BETA))
+    _, slide_count, changed = update_pptx(str(source), str(output))
+    after = read_parts(output)
+    assert changed == 1 and slide_count == len(slide_titles(output))
+    rewritten = {name for name in after if after[name] != before.get(name)}
+    assert "ppt/slides/slide3.xml" in rewritten
+    assert rewritten <= {"ppt/slides/slide3.xml", "ppt/slides/_rels/slide3.xml.rels"}
+    assert set(after) == set(before)
+
+
+def test_notes_survive_update_and_mode_is_kept(tmp_path):
+    source, output = make_deck(tmp_path)
+    add_notes(output, [None, "заметки альфы", "заметки беты"])
+    os.chmod(output, 0o644)
+    write_md(source, dict(SECTIONS, Beta=CHANGED_BETA))
+    update_pptx(str(source), str(output))
+    assert notes_by_title(output) == {"Alpha": "заметки альфы", "Beta": "заметки беты"}
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o644
+
+
+def test_notes_survive_when_section_is_merged_with_new_neighbour(tmp_path):
+    source, output = make_deck(tmp_path)
+    titles = slide_titles(output)
+    add_notes(output, [("заметки гаммы" if title == "Gamma" else None) for title in titles])
+    sections = {"Alpha": SECTIONS["Alpha"], "Beta": SECTIONS["Beta"], "New one": "- x\n",
+                "Gamma": SECTIONS["Gamma"], "Delta": SECTIONS["Delta"]}
+    write_md(source, sections)
+    update_pptx(str(source), str(output))
+    assert "New one / Gamma" in slide_titles(output)
+    assert notes_by_title(output) == {"New one / Gamma": "заметки гаммы"}
+
+
+def test_removed_section_drops_slide_notes_and_overrides(tmp_path):
+    source, output = make_deck(tmp_path)
+    add_notes(output, [None, None, "заметки беты"])
+    parts = read_parts(output)
+    notes_parts = [name for name in parts if name.startswith("ppt/notesSlides/notesSlide")]
+    assert len(notes_parts) == 1
+    write_md(source, {title: body for title, body in SECTIONS.items() if title != "Beta"})
+    update_pptx(str(source), str(output))
+    after = read_parts(output)
+    assert "Beta" not in slide_titles(output)
+    assert "ppt/slides/slide3.xml" not in after and notes_parts[0] not in after
+    content_types = after["[Content_Types].xml"].decode()
+    assert "/ppt/slides/slide3.xml" not in content_types and notes_parts[0] not in content_types
+    assert Presentation(str(output)).slides  # пакет открывается
+
+
+def test_manual_slide_stays_after_its_anchor(tmp_path):
+    source, output = make_deck(tmp_path)
+    prs = Presentation(str(output))
+    manual = prs.slides.add_slide(prs.slide_layouts[5])
+    manual.shapes.title.text = "Ручной слайд"
+    sld_id_lst = prs.slides._sldIdLst
+    sld_id_lst.insert(2, sld_id_lst[-1])  # после слайда Alpha
+    prs.save(str(output))
+    write_md(source, dict(SECTIONS, Alpha=bullets("новой альфы"), Beta=CHANGED_BETA))
+    update_pptx(str(source), str(output))
+    titles = slide_titles(output)
+    assert titles[1:4] == ["Alpha", "Ручной слайд", "Beta"]
+    assert titles.count("Ручной слайд") == 1
+
+
+def test_unchanged_update_does_not_write(tmp_path):
+    source, output = make_deck(tmp_path)
+    write_md(source, dict(SECTIONS, Beta=CHANGED_BETA))
+    update_pptx(str(source), str(output))
+    before = os.stat(output)
+    content = output.read_bytes()
+    _, _, changed = update_pptx(str(source), str(output))
+    after = os.stat(output)
+    assert changed == 0
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert output.read_bytes() == content
+
+
+def test_notes_survive_when_merged_section_is_split(tmp_path):
+    sections = {"Alpha": SECTIONS["Alpha"], "New one": "- x\n", "Gamma": SECTIONS["Gamma"],
+                "Delta": SECTIONS["Delta"]}
+    source, output = make_deck(tmp_path, sections)
+    add_notes(output, [("заметки" if title == "New one / Gamma" else None) for title in slide_titles(output)])
+    del sections["New one"]
+    write_md(source, sections)
+    update_pptx(str(source), str(output))
+    assert notes_by_title(output) == {"Gamma": "заметки"}
+
+
+def test_key_sources():
+    assert _key_sources("0123abcd.1.2") == ({"0123abcd.1"}, 2)
+    assert _key_sources("ch2.0123abcd.1+89abcdef.2.1") == ({"ch2.0123abcd.1", "ch2.89abcdef.2"}, 1)
+    assert _key_sources("title") is None and _key_sources("ch1") is None and _key_sources(None) is None